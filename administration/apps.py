@@ -0,0 +1,14 @@
+"""
+App configuration for the administration app.
+Connects the signal handlers that keep the dashboard counters current.
+"""
+
+from django.apps import AppConfig
+
+
+class AdministrationConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'administration'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,64 @@
+"""
+Cached global counters for the administration dashboard.
+Each count lives under its own cache key: signals nudge it up or down as rows are created and
+deleted, and it is recounted with one COUNT(*) once DASHBOARD_COUNTERS_TTL expires, which also
+corrects drift from bulk operations that send no signals.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from core import metrics
+
+COUNTERS_TTL = getattr(settings, 'DASHBOARD_COUNTERS_TTL', 300)
+
+
+def _counted_models():
+    from attendance.models import Student, AttendanceRecord
+    from core.models import Course, ClassSession
+    from faculty.models import FacultyProfile
+
+    # Counter name -> model whose rows it counts
+    return {
+        'student_count': Student,
+        'course_count': Course,
+        'faculty_count': FacultyProfile,
+        'session_count': ClassSession,
+        'attendance_count': AttendanceRecord,
+    }
+
+
+def _key(name):
+    return f'dashboard:{name}'
+
+
+def get_counts(names=None):
+    """Return the named counters (by default every counter), recounting only those missing from the cache."""
+    models = _counted_models()
+    if names is not None:
+        models = {name: models[name] for name in names}
+    counts = cache.get_many([_key(name) for name in models])
+    values = {}
+    for name, model in models.items():
+        value = counts.get(_key(name))
+        if value is None:
+            metrics.incr('dashboard_counters.misses')
+            value = model.objects.count()
+            cache.set(_key(name), value, COUNTERS_TTL)
+        values[name] = value
+    return values
+
+
+def adjust(model, delta):
+    """Nudge the counter for model's table by delta, if it is currently cached."""
+    for name, counted in _counted_models().items():
+        if counted is model:
+            try:
+                cache.incr(_key(name), delta)
+            except ValueError:
+                # Not cached; the next read counts it afresh
+                pass
+
+
+def invalidate():
+    cache.delete_many([_key(name) for name in _counted_models()])
@@ -0,0 +1,128 @@
+"""
+Student CSV import for the administration app.
+Streams the upload through an incremental decoder and applies it in chunks: each chunk is diffed
+against the existing admission numbers and only new or changed rows are upserted, one transaction
+per chunk, with progress saved to the StudentImportLog after every chunk.
+"""
+
+from itertools import islice
+import csv
+import io
+
+from django.db import transaction
+
+from attendance.models import Student
+
+IMPORT_BATCH_SIZE = 1000
+REQUIRED_COLUMNS = ['admission_number', 'first_name', 'last_name']
+MAX_LOGGED_ERRORS = 1000
+
+
+class ImportFormatError(ValueError):
+    """The CSV cannot be imported at all, e.g. a required column is missing."""
+
+
+def read_csv(binary_file):
+    """Return a CSV reader that decodes a binary file object as it is read rather than all at once."""
+    # utf-8-sig drops the BOM spreadsheet programs prepend, which would otherwise hide the first column
+    return csv.reader(io.TextIOWrapper(binary_file, encoding='utf-8-sig', newline=''))
+
+
+def import_student_csv(binary_file, import_log, batch_size=IMPORT_BATCH_SIZE):
+    """
+    Create or update students from a CSV file object, recording progress on import_log.
+    Raises ImportFormatError if the header lacks a required column.
+    """
+    reader = read_csv(binary_file)
+    header = [column.strip() for column in next(reader, [])]
+    if not all(column in header for column in REQUIRED_COLUMNS):
+        raise ImportFormatError('Missing required columns. CSV must contain: ' + ', '.join(REQUIRED_COLUMNS))
+    indexes = [header.index(column) for column in REQUIRED_COLUMNS]
+    limits = [Student._meta.get_field(column).max_length for column in REQUIRED_COLUMNS]
+
+    import_log.records_total = import_log.records_imported = import_log.records_failed = 0
+    errors = []
+    while True:
+        chunk = list(islice(reader, batch_size))
+        if not chunk:
+            break
+
+        # Later rows for the same admission number win, as they would if applied one by one
+        students = {}
+        imported = 0
+        for offset, row in enumerate(chunk, start=import_log.records_total + 1):
+            values, error = _parse_row(row, indexes, limits)
+            if error:
+                errors.append(f'Row {offset}: {error}')
+                import_log.records_failed += 1
+            else:
+                students[values[0]] = values
+                imported += 1
+
+        try:
+            _apply_chunk(students, batch_size)
+        except Exception:
+            # Fall back to one row at a time so a bad row is reported instead of failing the whole chunk
+            failed = _apply_rows(students, errors)
+            imported -= failed
+            import_log.records_failed += failed
+
+        import_log.records_total += len(chunk)
+        import_log.records_imported += imported
+        import_log.error_log = _format_errors(errors)
+        import_log.save(update_fields=['records_total', 'records_imported', 'records_failed', 'error_log', 'updated_at'])
+
+    return import_log
+
+
+def _parse_row(row, indexes, limits):
+    """Return ((admission_number, first_name, last_name), None) or (None, error message)."""
+    if len(row) <= max(indexes):
+        return None, 'Invalid format, missing fields'
+    values = tuple(row[index].strip() for index in indexes)
+    if not values[0]:
+        return None, 'Missing admission number'
+    for column, value, limit in zip(REQUIRED_COLUMNS, values, limits):
+        if len(value) > limit:
+            return None, f'{column} is longer than {limit} characters'
+    return values, None
+
+
+def _apply_chunk(students, batch_size):
+    """Upsert new and renamed students with one read and one bulk write; unchanged rows are skipped."""
+    existing = Student.objects.only('first_name', 'last_name').in_bulk(list(students))
+    changed = [
+        Student(admission_number=admission_number, first_name=first_name, last_name=last_name)
+        for admission_number, first_name, last_name in students.values()
+        if admission_number not in existing
+        or (existing[admission_number].first_name, existing[admission_number].last_name) != (first_name, last_name)
+    ]
+    # INSERT ... ON CONFLICT DO UPDATE writes inserts and updates in one statement per batch, where
+    # bulk_update's CASE expression grows with the batch; it also absorbs rows created concurrently
+    with transaction.atomic():
+        Student.objects.bulk_create(
+            changed, batch_size=batch_size, update_conflicts=True,
+            unique_fields=['admission_number'], update_fields=['first_name', 'last_name'],
+        )
+
+
+def _apply_rows(students, errors):
+    """Apply a chunk row by row, logging each failure; returns how many rows failed."""
+    failed = 0
+    for admission_number, first_name, last_name in students.values():
+        try:
+            with transaction.atomic():
+                Student.objects.update_or_create(
+                    admission_number=admission_number,
+                    defaults={'first_name': first_name, 'last_name': last_name},
+                )
+        except Exception as e:
+            errors.append(f'{admission_number}: {e}')
+            failed += 1
+    return failed
+
+
+def _format_errors(errors):
+    if len(errors) <= MAX_LOGGED_ERRORS:
+        return '\n'.join(errors)
+    return '\n'.join(errors[:MAX_LOGGED_ERRORS] + [f'... and {len(errors) - MAX_LOGGED_ERRORS} more errors'])
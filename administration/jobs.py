@@ -0,0 +1,110 @@
+"""
+Background student import jobs for the administration app.
+StudentImportLog doubles as the job record: the request saves the upload and a PENDING log, and
+`manage.py run_import_worker` claims PENDING logs one at a time and imports them, so no broker is needed.
+"""
+
+from datetime import timedelta
+import logging
+import time
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+from core import metrics
+from . import audit
+from .importers import import_student_csv, ImportFormatError
+from .models import StudentImportLog
+
+logger = logging.getLogger(__name__)
+
+STALE_SECONDS = getattr(settings, 'STUDENT_IMPORT_STALE_SECONDS', 600)
+
+
+def enqueue_student_import(csv_file, admin):
+    """Save the upload and a PENDING log for a worker to pick up; returns the log."""
+    import_log = StudentImportLog(admin=admin, filename=csv_file.name, status='PENDING')
+    import_log.upload.save(csv_file.name, csv_file, save=False)
+    import_log.save()
+    metrics.incr('student_import.enqueued')
+    return import_log
+
+
+def claim_next_job():
+    """Move the oldest PENDING import to PROCESSING and return it, or None if there is nothing to do."""
+    for job_id in StudentImportLog.objects.filter(status='PENDING').order_by('import_date', 'id').values_list('id', flat=True)[:10]:
+        # The conditional UPDATE is the lock: only one worker sees a row count of 1
+        if StudentImportLog.objects.filter(id=job_id, status='PENDING').update(status='PROCESSING', updated_at=timezone.now()):
+            return StudentImportLog.objects.get(id=job_id)
+    return None
+
+
+def requeue_stale_jobs(stale_seconds=STALE_SECONDS):
+    """Return PROCESSING imports whose worker stopped reporting progress to the queue."""
+    cutoff = timezone.now() - timedelta(seconds=stale_seconds)
+    count = StudentImportLog.objects.filter(status='PROCESSING', updated_at__lt=cutoff).exclude(upload='').update(status='PENDING')
+    if count:
+        logger.warning('Requeued %d stale student imports', count)
+    return count
+
+
+def run_job(import_log):
+    """Import a claimed job's file and record the outcome on its log."""
+    try:
+        with import_log.upload.open('rb') as upload:
+            import_student_csv(upload, import_log)
+    except ImportFormatError as e:
+        _fail(import_log, str(e))
+        return import_log
+    except Exception as e:
+        logger.exception('Student import %s failed', import_log.id)
+        _fail(import_log, str(e))
+        return import_log
+
+    import_log.status = 'COMPLETED'
+    import_log.save(update_fields=['status', 'updated_at'])
+    import_log.upload.delete(save=True)
+    audit.record(
+        import_log.admin,
+        'IMPORT',
+        'Student',
+        details=f'Imported {import_log.records_imported} students from {import_log.filename}',
+    )
+    metrics.incr('student_import.completed')
+    return import_log
+
+
+def _fail(import_log, error):
+    # Keep the upload of a failed import so it can be inspected
+    import_log.status = 'FAILED'
+    import_log.error_log = '\n'.join(filter(None, [import_log.error_log, error]))
+    import_log.save(update_fields=['status', 'error_log', 'updated_at'])
+    metrics.incr('student_import.failed')
+
+
+def run_worker(poll_interval=2.0, once=False, stale_seconds=STALE_SECONDS):
+    """Process queued imports until interrupted; with once, stop when the queue is empty."""
+    while True:
+        close_old_connections()
+        requeue_stale_jobs(stale_seconds)
+        job = claim_next_job()
+        if job is not None:
+            run_job(job)
+            continue
+        if once:
+            return
+        time.sleep(poll_interval)
+
+
+def job_status(import_log):
+    """The fields the import page polls for."""
+    return {
+        'id': import_log.id,
+        'filename': import_log.filename,
+        'status': import_log.status,
+        'records_total': import_log.records_total,
+        'records_imported': import_log.records_imported,
+        'records_failed': import_log.records_failed,
+        'finished': import_log.status in ('COMPLETED', 'FAILED'),
+    }
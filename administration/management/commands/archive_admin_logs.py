@@ -0,0 +1,29 @@
+"""
+Management command that archives old AdminLog entries.
+Moves entries older than the retention horizon into monthly gzipped JSONL files; run it daily.
+"""
+
+from django.core.management.base import BaseCommand
+
+from administration import audit, retention
+from administration.models import AdminLog
+
+
+class Command(BaseCommand):
+    help = 'Move AdminLog entries older than ADMIN_LOG_RETENTION_DAYS into monthly archive files.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=retention.RETENTION_DAYS, help='Keep this many days in the table')
+        parser.add_argument('--batch-size', type=int, default=retention.ARCHIVE_BATCH_SIZE)
+        parser.add_argument('--dry-run', action='store_true', help='Only report how many entries are due')
+
+    def handle(self, *args, **options):
+        before = retention.horizon(options['days'])
+        if options['dry_run']:
+            due = AdminLog.objects.filter(timestamp__lt=before).count()
+            self.stdout.write(f'{due} entries older than {before:%Y-%m-%d} are due for archiving.')
+            return
+        # Queued entries belong in the table before it is trimmed
+        audit.flush()
+        moved = retention.archive_logs(before, options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'Archived {moved} entries older than {before:%Y-%m-%d} to {retention.ARCHIVE_DIR}.'))
@@ -0,0 +1,122 @@
+"""
+Management command to benchmark the admin attendance record pages.
+Fills a synthetic attendance table inside a transaction that is rolled back, then times pages at
+increasing depth cut with OFFSET against the same pages cut with a keyset cursor.
+"""
+
+from datetime import time as clock, timedelta
+import json
+import time
+import uuid
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.utils import timezone
+
+from attendance.models import Student, AttendanceRecord
+from core.benchmarks import summarize
+from core.models import Course, ClassSession
+from core.pagination import paginate, keyset_paginate, encode_cursor
+
+ORDERING = ['-timestamp', '-id']
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compare OFFSET and keyset pagination of attendance records at increasing page depth.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5_000_000, help='Attendance records in the synthetic table')
+        parser.add_argument('--students', type=int, default=2000, help='Students marked in every session')
+        parser.add_argument('--per-page', type=int, default=50)
+        parser.add_argument('--repeat', type=int, default=5, help='Timed fetches per page depth')
+        parser.add_argument('--json', action='store_true', help='Print the results as a single JSON object')
+
+    def handle(self, *args, **options):
+        per_page = options['per_page']
+        results = []
+        try:
+            with transaction.atomic():
+                start = time.perf_counter()
+                rows = self._build_table(options['rows'], options['students'])
+                self.stderr.write(f'Built {rows} attendance records in {time.perf_counter() - start:.1f}s')
+                with connection.cursor() as cursor:
+                    cursor.execute('ANALYZE')
+
+                records = AttendanceRecord.objects.all()
+                last_page = max(1, rows // per_page)
+                depths = sorted({1, *(d for d in (10, 100, 1000, 10_000, 100_000) if d < last_page), last_page})
+                for depth in depths:
+                    offset = (depth - 1) * per_page
+                    # The cursor a reader would hold after paging down to this depth
+                    after = None
+                    if offset:
+                        key = records.order_by(*ORDERING).values_list('timestamp', 'id')[offset - 1]
+                        after = encode_cursor(key)
+                    results.append({
+                        'page': depth,
+                        'offset': summarize(self._time(lambda: paginate(records.order_by(*ORDERING), depth, per_page),
+                                                       options['repeat'])),
+                        'keyset': summarize(self._time(lambda: keyset_paginate(records, ORDERING, after, per_page=per_page),
+                                                       options['repeat'])),
+                    })
+                raise Rollback
+        except Rollback:
+            pass
+
+        if options['json']:
+            self.stdout.write(json.dumps({'rows': rows, 'per_page': per_page, 'pages': results}))
+            return
+        self.stdout.write(f'{rows} rows, {per_page} per page')
+        self.stdout.write(f'{"page":>10}{"offset p50 ms":>16}{"keyset p50 ms":>16}{"speedup":>10}')
+        for r in results:
+            offset_ms, keyset_ms = r['offset']['p50_ms'], r['keyset']['p50_ms']
+            speedup = offset_ms / keyset_ms if keyset_ms else 0.0
+            self.stdout.write(f'{r["page"]:>10}{offset_ms:>16.2f}{keyset_ms:>16.2f}{speedup:>9.1f}x')
+
+    def _time(self, fetch, repeat):
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fetch()
+            samples.append(time.perf_counter() - start)
+        return samples
+
+    def _build_table(self, rows, student_count):
+        """Mark every student present in as many sessions as it takes to reach `rows` records."""
+        tag = uuid.uuid4().hex[:8]
+        lecturer = User.objects.create_user(username=f'keyset-{tag}')
+        course = Course.objects.create(course_code=f'KEY-{tag}', title='Keyset benchmark')
+        students = Student.objects.bulk_create(
+            [Student(admission_number=f'K{tag}{i:06d}', first_name='Keyset', last_name=str(i)) for i in range(student_count)],
+            batch_size=1000,
+        )
+        session_count = -(-rows // student_count)
+        today = timezone.localdate()
+        sessions = ClassSession.objects.bulk_create([
+            ClassSession(course=course, faculty=lecturer, title=f'Keyset {s}', is_active=False,
+                         date=today - timedelta(days=s // 4), start_time=clock(8 + 2 * (s % 4)), end_time=clock(9 + 2 * (s % 4)))
+            for s in range(session_count)
+        ], batch_size=1000)
+        # Sessions a few hours apart, marks a second apart; bulk_create skips the summary signals
+        now = timezone.now()
+        created, batch = 0, []
+        for s, session in enumerate(sessions):
+            opened = now - timedelta(hours=6 * s)
+            for i, student in enumerate(students):
+                if created + len(batch) == rows:
+                    break
+                batch.append(AttendanceRecord(
+                    session=session, student=student, timestamp=opened + timedelta(seconds=i),
+                    ip_address=f'10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}',
+                ))
+            if len(batch) >= 10_000:
+                AttendanceRecord.objects.bulk_create(batch, batch_size=1000)
+                created += len(batch)
+                batch = []
+        AttendanceRecord.objects.bulk_create(batch, batch_size=1000)
+        return created + len(batch)
@@ -0,0 +1,109 @@
+"""
+Management command to benchmark the student CSV importer.
+Imports generated files of each requested size twice (all inserts, then half the rows renamed)
+inside a transaction that is rolled back, and reports rows per second and peak memory.
+"""
+
+import json
+import resource
+import tempfile
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from administration.importers import import_student_csv, IMPORT_BATCH_SIZE
+from administration.models import StudentImportLog
+from attendance.models import Student
+
+
+class Rollback(Exception):
+    pass
+
+
+def write_csv(handle, tag, rows, renamed=False):
+    """Write a students CSV of `rows` rows; with renamed, every other row gets a new last name."""
+    handle.write(b'admission_number,first_name,last_name\n')
+    for i in range(rows):
+        last_name = f'Renamed{i}' if renamed and i % 2 == 0 else f'Student{i}'
+        handle.write(f'B{tag}{i:08d},Bench,{last_name}\n'.encode())
+    handle.seek(0)
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the streaming student CSV import at several file sizes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[10_000, 100_000, 1_000_000],
+                            help='File sizes to import')
+        parser.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE)
+        parser.add_argument('--baseline-rows', type=int, default=2000,
+                            help='Rows to time with per-row update_or_create for comparison (0 to skip)')
+        parser.add_argument('--json', action='store_true', help='Print the results as a single JSON object')
+
+    def handle(self, *args, **options):
+        results = []
+        if options['baseline_rows']:
+            results.append(self._baseline(options['baseline_rows']))
+        for rows in options['rows']:
+            for renamed in (False, True):
+                results.append(self._run(rows, renamed, options['batch_size']))
+            results[-2]['pass'], results[-1]['pass'] = 'insert', 'update'
+
+        if options['json']:
+            self.stdout.write(json.dumps(results))
+            return
+        self.stdout.write(f'{"rows":>10} {"pass":<10}{"seconds":>10}{"rows/s":>12}{"peak RSS MB":>14}')
+        for r in results:
+            self.stdout.write(f'{r["rows"]:>10} {r["pass"]:<10}{r["seconds"]:>10.2f}{r["rows_per_sec"]:>12.0f}{r["peak_rss_mb"]:>14.1f}')
+
+    def _run(self, rows, renamed, batch_size):
+        tag = uuid.uuid4().hex[:8]
+        try:
+            with transaction.atomic(), tempfile.TemporaryFile() as initial, tempfile.TemporaryFile() as changed:
+                write_csv(initial, tag, rows)
+                log = StudentImportLog.objects.create(filename=f'bench-{rows}.csv', status='PROCESSING')
+                start = time.perf_counter()
+                import_student_csv(initial, log, batch_size)
+                elapsed = time.perf_counter() - start
+                if renamed:
+                    write_csv(changed, tag, rows, renamed=True)
+                    start = time.perf_counter()
+                    import_student_csv(changed, log, batch_size)
+                    elapsed = time.perf_counter() - start
+                if log.records_imported != rows:
+                    self.stderr.write(f'{rows} rows: only {log.records_imported} imported')
+                raise Rollback
+        except Rollback:
+            pass
+        return {
+            'rows': rows,
+            'pass': 'update' if renamed else 'insert',
+            'seconds': elapsed,
+            'rows_per_sec': rows / elapsed if elapsed else 0.0,
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        }
+
+    def _baseline(self, rows):
+        """Time the previous importer's per-row update_or_create."""
+        tag = uuid.uuid4().hex[:8]
+        try:
+            with transaction.atomic():
+                start = time.perf_counter()
+                for i in range(rows):
+                    Student.objects.update_or_create(
+                        admission_number=f'B{tag}{i:08d}',
+                        defaults={'first_name': 'Bench', 'last_name': f'Student{i}'},
+                    )
+                elapsed = time.perf_counter() - start
+                raise Rollback
+        except Rollback:
+            pass
+        return {
+            'rows': rows,
+            'pass': 'per-row',
+            'seconds': elapsed,
+            'rows_per_sec': rows / elapsed if elapsed else 0.0,
+            'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        }
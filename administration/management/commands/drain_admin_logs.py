@@ -0,0 +1,18 @@
+"""
+Management command to drain the buffered audit log.
+Run it after workers have stopped to write any AdminLog entries they spooled but never flushed.
+"""
+
+from django.core.management.base import BaseCommand
+
+from administration import audit
+
+
+class Command(BaseCommand):
+    help = 'Write AdminLog entries left in the audit log spool by stopped workers.'
+
+    def handle(self, *args, **options):
+        # Anything queued in this process goes first
+        audit.flush()
+        drained = audit.drain()
+        self.stdout.write(self.style.SUCCESS(f'Drained {drained} spooled audit log entries.'))
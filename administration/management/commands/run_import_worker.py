@@ -0,0 +1,25 @@
+"""
+Management command that runs the background student import worker.
+Run one or more alongside the web server; each claims queued StudentImportLog jobs in turn.
+"""
+
+from django.core.management.base import BaseCommand
+
+from administration.jobs import run_worker, STALE_SECONDS
+
+
+class Command(BaseCommand):
+    help = 'Process queued student CSV imports.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=2.0, help='Seconds to wait when the queue is empty')
+        parser.add_argument('--once', action='store_true', help='Exit once the queue is empty')
+        parser.add_argument('--stale-after', type=int, default=STALE_SECONDS,
+                            help='Requeue PROCESSING imports with no progress for this many seconds')
+
+    def handle(self, *args, **options):
+        self.stdout.write('Waiting for student imports...' if not options['once'] else 'Draining student imports...')
+        try:
+            run_worker(options['poll_interval'], options['once'], options['stale_after'])
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='adminlog',
+            index=models.Index(fields=['timestamp', 'action'], name='adminlog_timestamp_action_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='adminlog',
+            index=models.Index(fields=['action', 'timestamp'], name='adminlog_action_timestamp_idx'),
+        ),
+    ]
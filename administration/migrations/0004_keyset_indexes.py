@@ -0,0 +1,29 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('administration', '0003_studentimportlog_upload'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='adminlog',
+            name='adminlog_timestamp_action_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='adminlog',
+            name='adminlog_action_timestamp_idx',
+        ),
+        migrations.AddIndex(
+            model_name='adminlog',
+            index=models.Index(fields=['timestamp', 'id'], name='adminlog_timestamp_id_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='adminlog',
+            index=models.Index(fields=['action', 'timestamp', 'id'], name='adminlog_action_timestamp_idx'),
+        ),
+    ]
@@ -40,6 +40,11 @@ class AdminLog(models.Model):
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            # Activity log pages seek on (timestamp, id), optionally filtered by action
+            models.Index(fields=['timestamp', 'id'], name='adminlog_timestamp_id_idx'),
+            models.Index(fields=['action', 'timestamp', 'id'], name='adminlog_action_timestamp_idx'),
+        ]
     
     def __str__(self):
         return f"{self.admin} - {self.action} {self.object_type} - {self.timestamp}"
@@ -61,6 +66,10 @@ class StudentImportLog(models.Model):
     records_imported = models.IntegerField(default=0)
     records_failed = models.IntegerField(default=0)
     error_log = models.TextField(blank=True)
+    # The queued CSV, kept until a worker has imported it
+    upload = models.FileField(upload_to='imports/', blank=True)
+    # Bumped with every progress save so workers can spot jobs abandoned mid-import
+    updated_at = models.DateTimeField(auto_now=True)
     
     def __str__(self):
         return f"{self.filename} - {self.import_date} - {self.status}"
@@ -0,0 +1,170 @@
+"""
+AdminLog retention for the administration app.
+Entries older than ADMIN_LOG_RETENTION_DAYS are moved out of the hot table into one gzipped
+JSONL file per local calendar month under ADMIN_LOG_ARCHIVE_DIR, keeping the table and its
+indexes small. activity_logs reads the archives too when its date range reaches back into them.
+"""
+
+from datetime import datetime, timedelta
+import gzip
+from itertools import groupby
+import json
+import os
+from pathlib import Path
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core import metrics
+from core.filters import day_start
+from core.pagination import keyset_page, seek
+from .models import AdminLog
+
+RETENTION_DAYS = getattr(settings, 'ADMIN_LOG_RETENTION_DAYS', 180)
+ARCHIVE_DIR = Path(getattr(settings, 'ADMIN_LOG_ARCHIVE_DIR', settings.BASE_DIR / 'archive' / 'admin_logs'))
+ARCHIVE_BATCH_SIZE = 5000
+
+ORDERING = ['-timestamp', '-id']
+FIELDS = ['id', 'admin_id', 'admin__username', 'action', 'object_type', 'object_id', 'details', 'timestamp', 'ip_address']
+
+
+def horizon(days=RETENTION_DAYS):
+    """Entries stamped before this are due for archiving."""
+    return day_start(timezone.localdate() - timedelta(days=days))
+
+
+def archive_path(month):
+    return ARCHIVE_DIR / f'adminlog-{month:%Y-%m}.jsonl.gz'
+
+
+def _month(timestamp):
+    return timezone.localtime(timestamp).date().replace(day=1)
+
+
+def _append(month, rows):
+    """Append rows to a month's archive as a new gzip member; gzip readers see one concatenated stream."""
+    ARCHIVE_DIR.mkdir(parents=True, exist_ok=True)
+    with open(archive_path(month), 'ab') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as archive:
+            for row in rows:
+                data = {name: row[name] for name in FIELDS if name != 'admin__username'}
+                data.update(timestamp=row['timestamp'].isoformat(), admin_username=row['admin__username'])
+                archive.write((json.dumps(data) + '\n').encode())
+        raw.flush()
+        os.fsync(raw.fileno())
+
+
+def archive_logs(before=None, batch_size=ARCHIVE_BATCH_SIZE):
+    """Move entries stamped before `before` (default: the retention horizon) to the archives; returns how many."""
+    before = before or horizon()
+    moved = 0
+    while True:
+        batch = list(
+            AdminLog.objects.filter(timestamp__lt=before).order_by('timestamp', 'id').values(*FIELDS)[:batch_size]
+        )
+        if not batch:
+            return moved
+        # Written and synced before the rows go, so a crash can only duplicate entries (reads skip those)
+        for month, rows in groupby(batch, key=lambda row: _month(row['timestamp'])):
+            _append(month, list(rows))
+        with transaction.atomic():
+            AdminLog.objects.filter(id__in=[row['id'] for row in batch]).delete()
+        moved += len(batch)
+        metrics.incr('admin_log.archived', len(batch))
+
+
+def _entry(data):
+    entry = AdminLog(
+        id=data['id'],
+        action=data['action'],
+        object_type=data['object_type'],
+        object_id=data['object_id'],
+        details=data['details'],
+        timestamp=parse_datetime(data['timestamp']),
+        ip_address=data['ip_address'],
+    )
+    if data['admin_id'] is not None:
+        # Enough of the admin to display, without a query per row
+        entry.admin = User(id=data['admin_id'], username=data['admin_username'])
+    entry.archived = True
+    return entry
+
+
+def read_archive(month):
+    """Every entry archived for a month, oldest first."""
+    path = archive_path(month)
+    if not path.exists():
+        return []
+    entries, seen = [], set()
+    with gzip.open(path, 'rt', encoding='utf-8') as archive:
+        for line in archive:
+            data = json.loads(line)
+            if data['id'] not in seen:
+                seen.add(data['id'])
+                entries.append(_entry(data))
+    entries.sort(key=lambda entry: (entry.timestamp, entry.id))
+    return entries
+
+
+def _months(since, until):
+    """Archived months overlapping [since, until), newest first."""
+    first = _month(since)
+    last = _month(until) if until else None
+    months = []
+    for path in ARCHIVE_DIR.glob('adminlog-*.jsonl.gz'):
+        month = datetime.strptime(path.name[len('adminlog-'):-len('.jsonl.gz')], '%Y-%m').date()
+        if month >= first and (last is None or month <= last):
+            months.append(month)
+    return sorted(months, reverse=True)
+
+
+def archived_logs(since, until, action=None, username=None, cursor=None, forward=True, limit=100):
+    """
+    Up to limit archived entries in [since, until) past the cursor, newest first (oldest first
+    when not forward), read one month file at a time.
+    """
+    months = _months(since, until)
+    if not forward:
+        months.reverse()
+    found = []
+    for month in months:
+        entries = read_archive(month)
+        if forward:
+            entries.reverse()
+        for entry in entries:
+            if entry.timestamp < since or (until and entry.timestamp >= until):
+                continue
+            if action and entry.action != action:
+                continue
+            if username and (entry.admin is None or entry.admin.username != username):
+                continue
+            if cursor is not None:
+                key = (entry.timestamp, entry.id)
+                if (key >= tuple(cursor)) if forward else (key <= tuple(cursor)):
+                    continue
+            found.append(entry)
+            if len(found) >= limit:
+                return found
+    return found
+
+
+def reaches_archive(since, until=None):
+    """Whether a date range starting at since needs the archives; ranges with no start stay on the hot table."""
+    return since is not None and bool(_months(since, until))
+
+
+def activity_log_page(queryset, since, until, action=None, username=None, after=None, before=None, per_page=100):
+    """A keyset page of the hot queryset, merged with archived entries when the range reaches them."""
+    def fetch(cursor, forward, limit):
+        rows = list(seek(queryset, ORDERING, cursor, forward)[:limit])
+        if forward and len(rows) >= limit:
+            # Archived entries are older than every hot one
+            return rows
+        rows += archived_logs(since, until, action, username, cursor, forward, limit)
+        rows.sort(key=lambda entry: (entry.timestamp, entry.id), reverse=forward)
+        return rows[:limit]
+
+    return keyset_page(fetch, AdminLog, ORDERING, after, before, per_page)
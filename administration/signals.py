@@ -0,0 +1,38 @@
+"""
+Signal handlers for the administration app.
+Moves the cached dashboard counters as counted rows are created and deleted.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from attendance.models import Student, AttendanceRecord
+from core.models import Course, ClassSession
+from faculty.models import FacultyProfile
+
+from . import counters
+
+
+def _adjust_after_commit(model, delta):
+    # A rolled-back row never reaches the counter
+    transaction.on_commit(lambda: counters.adjust(model, delta))
+
+
+@receiver(post_save, sender=Student)
+@receiver(post_save, sender=Course)
+@receiver(post_save, sender=FacultyProfile)
+@receiver(post_save, sender=ClassSession)
+@receiver(post_save, sender=AttendanceRecord)
+def count_created_row(sender, created, **kwargs):
+    if created:
+        _adjust_after_commit(sender, 1)
+
+
+@receiver(post_delete, sender=Student)
+@receiver(post_delete, sender=Course)
+@receiver(post_delete, sender=FacultyProfile)
+@receiver(post_delete, sender=ClassSession)
+@receiver(post_delete, sender=AttendanceRecord)
+def count_deleted_row(sender, **kwargs):
+    _adjust_after_commit(sender, -1)
@@ -0,0 +1,252 @@
+"""
+Tests for the administration app.
+"""
+
+from datetime import time, timedelta
+from pathlib import Path
+import tempfile
+import time as clock
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from attendance.models import Student, AttendanceRecord
+from core.models import Course, ClassSession
+from core.filters import filter_date_range
+from core.pagination import seek
+from core.testing import ExplainTestCase, QueryCountTestCase
+from . import audit, counters, retention
+from .models import AdminLog
+
+
+@override_settings(ADMIN_LOG_SYNC=False)
+class AuditLogTests(TransactionTestCase):
+    """Entries are written by the background writer, so these run with real commits and no flush()."""
+
+    def setUp(self):
+        self.admin = User.objects.create_superuser(username='admin', password='admin')
+
+    def logged(self, object_id, timeout=2.0):
+        """Whether an entry for object_id is written within timeout."""
+        deadline = clock.monotonic() + timeout
+        while not AdminLog.objects.filter(object_id=object_id).exists():
+            if clock.monotonic() > deadline:
+                return False
+            clock.sleep(0.02)
+        return True
+
+    def test_entries_are_written_without_flushing(self):
+        audit.record(self.admin, 'UPDATE', 'Course', 1)
+        self.assertTrue(self.logged('1'))
+        # A later entry starts a new batch after the first has been written
+        audit.record(self.admin, 'UPDATE', 'Course', 2)
+        self.assertTrue(self.logged('2'))
+
+    def test_dashboard_shows_entries_without_flushing(self):
+        audit.record(self.admin, 'DELETE', 'Student', 7, 'Deleted student S7')
+        self.assertTrue(self.logged('7'))
+        self.client.force_login(self.admin)
+        response = self.client.get('/administration/dashboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('7', [entry.object_id for entry in response.context['recent_logs']])
+
+    def tearDown(self):
+        audit.flush()
+
+
+@override_settings(ADMIN_LOG_SYNC=True)
+class ExportStudentsTests(TestCase):
+    def setUp(self):
+        counters.invalidate()
+        self.admin = User.objects.create_superuser(username='admin', password='admin')
+        for i in range(3):
+            Student.objects.create(admission_number=f'E{i}', first_name='Student', last_name=str(i))
+        self.client.force_login(self.admin)
+
+    def test_aborted_download_is_audited(self):
+        response = self.client.get('/administration/students/export/')
+        # The client goes away before reading any of the body
+        response.close()
+        entry = AdminLog.objects.get(action='EXPORT')
+        self.assertEqual(entry.details, 'Exported 3 students')
+
+    def test_count_comes_from_the_dashboard_counter(self):
+        counters.get_counts(['student_count'])
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/administration/students/export/').close()
+        self.assertFalse([q['sql'] for q in ctx.captured_queries if 'COUNT(' in q['sql'].upper()])
+        self.assertEqual(AdminLog.objects.get(action='EXPORT').details, 'Exported 3 students')
+
+
+class DashboardPagingTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create_superuser(username='admin', password='admin')
+        course = Course.objects.create(course_code='DSH-101', title='Dashboard')
+        session = ClassSession.objects.create(
+            course=course, faculty=admin, title='Lecture', start_time=time(8), end_time=time(10),
+        )
+        now = timezone.now()
+        students = Student.objects.bulk_create([
+            Student(admission_number=f'D{i:02d}', first_name='Student', last_name=str(i)) for i in range(30)
+        ])
+        # bulk_create keeps the given timestamps, which save() would overwrite
+        AttendanceRecord.objects.bulk_create([
+            AttendanceRecord(session=session, student=student, timestamp=now - timedelta(minutes=i))
+            for i, student in enumerate(students)
+        ])
+        self.client.force_login(admin)
+
+    def test_records_are_paged_by_cursor(self):
+        first = self.client.get('/administration/dashboard/').context['attendance_records']
+        self.assertEqual([r.student_id for r in first], [f'D{i:02d}' for i in range(25)])
+        self.assertTrue(first.has_next())
+        second = self.client.get('/administration/dashboard/', {'after': first.next_cursor}).context['attendance_records']
+        self.assertEqual([r.student_id for r in second], [f'D{i:02d}' for i in range(25, 30)])
+        self.assertFalse(second.has_next())
+        back = self.client.get('/administration/dashboard/', {'before': second.previous_cursor}).context['attendance_records']
+        self.assertEqual([r.student_id for r in back], [r.student_id for r in first])
+
+
+class RetentionTests(TestCase):
+    """250 entries six hours apart, the oldest 100 archived; newest first they are entries[0..249]."""
+
+    def setUp(self):
+        archive_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(archive_dir.cleanup)
+        patcher = mock.patch.object(retention, 'ARCHIVE_DIR', Path(archive_dir.name))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        admins = [User.objects.create_user(username=name) for name in ('admin-a', 'admin-b')]
+        now = timezone.now()
+        AdminLog.objects.bulk_create([
+            AdminLog(
+                admin=admins[i % 2], action=('UPDATE', 'DELETE', 'CREATE')[i % 3], object_type='Course',
+                object_id=str(i), timestamp=now - timedelta(hours=6 * i),
+            )
+            for i in range(250)
+        ])
+        self.entries = list(AdminLog.objects.order_by('-timestamp', '-id').values_list('id', flat=True))
+        self.horizon = now - timedelta(hours=6 * 150 - 1)
+        self.since = now - timedelta(hours=6 * 250)
+
+    def archive(self, **kwargs):
+        return retention.archive_logs(self.horizon, **kwargs)
+
+    def test_archive_moves_old_entries_into_monthly_files(self):
+        self.assertEqual(self.archive(batch_size=7), 100)
+        self.assertEqual(list(AdminLog.objects.order_by('-timestamp', '-id').values_list('id', flat=True)), self.entries[:150])
+        archived = []
+        for month in retention._months(self.since, None):
+            entries = retention.read_archive(month)
+            self.assertTrue(all(retention._month(entry.timestamp) == month for entry in entries))
+            archived += [entry.id for entry in reversed(entries)]
+        self.assertEqual(archived, self.entries[150:])
+        self.assertEqual(self.archive(), 0)
+
+    def test_entries_archived_twice_after_a_crash_are_read_once(self):
+        # The process dies after the archive is written but before the rows are deleted
+        with mock.patch.object(retention.transaction, 'atomic', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                self.archive(batch_size=40)
+        self.assertEqual(AdminLog.objects.count(), 250)
+        self.assertEqual(self.archive(batch_size=40), 100)
+        archived = sorted(entry.id for month in retention._months(self.since, None) for entry in retention.read_archive(month))
+        self.assertEqual(archived, sorted(self.entries[150:]))
+
+    def page(self, queryset=None, action=None, username=None, after=None, before=None):
+        queryset = AdminLog.objects.all() if queryset is None else queryset
+        return retention.activity_log_page(queryset, self.since, None, action, username, after, before, per_page=60)
+
+    def test_pages_run_across_the_hot_table_into_the_archive_and_back(self):
+        self.archive()
+        pages, after = [], None
+        while True:
+            page = self.page(after=after)
+            pages.append(page)
+            if not page.has_next():
+                break
+            after = page.next_cursor
+        self.assertEqual([entry.id for page in pages for entry in page], self.entries)
+        # Back from the last page, which is entirely archived, and from the page straddling the boundary
+        for later, earlier in zip(pages[:0:-1], pages[-2::-1]):
+            back = self.page(before=later.previous_cursor)
+            self.assertEqual([entry.id for entry in back], [entry.id for entry in earlier])
+
+    def test_filters_apply_to_archived_entries(self):
+        self.archive()
+        queryset = AdminLog.objects.filter(action='UPDATE', admin__username='admin-b')
+        ids = [entry.id for entry in self.page(queryset, 'UPDATE', 'admin-b')]
+        expected = [self.entries[i] for i in range(250) if i % 3 == 0 and i % 2 == 1]
+        self.assertEqual(ids, expected)
+        self.assertTrue(any(entry_id in self.entries[150:] for entry_id in ids))
+
+
+class ListQueryCountTests(QueryCountTestCase):
+    def test_session_list(self):
+        self.assertFixedQueryCount('administration:session_list', self.admin)
+
+    def test_student_list(self):
+        self.assertFixedQueryCount('administration:student_list', self.admin)
+
+    def test_course_list(self):
+        self.assertFixedQueryCount('administration:course_list', self.admin)
+
+    def test_faculty_list(self):
+        self.assertFixedQueryCount('administration:faculty_list', self.admin)
+
+
+class HotQueryTests(ExplainTestCase):
+    def test_dashboard_recent_attendance(self):
+        self.assertIndexed(AttendanceRecord.objects.order_by('-timestamp', '-id')[:26], 'attendance_attendancerecord')
+
+    def test_attendance_records_page_after_cursor(self):
+        cursor = [timezone.now() - timedelta(days=1), 1]
+        self.assertIndexed(
+            seek(AttendanceRecord.objects.all(), ['-timestamp', '-id'], cursor)[:51], 'attendance_attendancerecord',
+        )
+
+    def test_activity_logs_page_after_cursor(self):
+        cursor = [timezone.now() - timedelta(hours=1), 1]
+        self.assertIndexed(seek(AdminLog.objects.all(), ['-timestamp', '-id'], cursor)[:101], 'administration_adminlog')
+
+    def test_activity_logs_by_action_page_after_cursor(self):
+        cursor = [timezone.now() - timedelta(hours=1), 1]
+        self.assertIndexed(
+            seek(AdminLog.objects.filter(action='UPDATE'), ['-timestamp', '-id'], cursor)[:101],
+            'administration_adminlog',
+        )
+
+    def test_attendance_records_date_range(self):
+        # The views pass the ?date_start= / ?date_end= strings straight through
+        week_ago = (timezone.localdate() - timedelta(days=7)).isoformat()
+        records = filter_date_range(AttendanceRecord.objects.all(), 'timestamp', week_ago, timezone.localdate())
+        self.assertIndexed(records.order_by('-timestamp', '-id')[:51], 'attendance_attendancerecord')
+
+    def test_attendance_records_date_range_by_course(self):
+        week_ago = (timezone.localdate() - timedelta(days=7)).isoformat()
+        records = AttendanceRecord.objects.filter(session__course=self.course)
+        self.assertIndexed(filter_date_range(records, 'timestamp', week_ago, week_ago), 'attendance_attendancerecord')
+
+    def test_activity_logs_date_range(self):
+        week_ago = (timezone.localdate() - timedelta(days=7)).isoformat()
+        self.assertIndexed(
+            filter_date_range(AdminLog.objects.all(), 'timestamp', week_ago, week_ago), 'administration_adminlog',
+        )
+
+    def test_activity_logs_date_range_by_action(self):
+        week_ago = (timezone.localdate() - timedelta(days=7)).isoformat()
+        logs = AdminLog.objects.filter(action='UPDATE')
+        self.assertIndexed(
+            filter_date_range(logs, 'timestamp', week_ago, timezone.localdate()), 'administration_adminlog',
+        )
+
+    def test_session_list_page_after_cursor(self):
+        cursor = [timezone.localdate(), time(8), 1]
+        self.assertIndexed(
+            seek(ClassSession.objects.all(), ['-date', '-start_time', '-id'], cursor)[:51], 'core_classsession',
+        )
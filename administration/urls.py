@@ -26,12 +26,14 @@ urlpatterns = [
     path('students/', views.student_list, name='student_list'),
     path('students/create/', views.create_student, name='create_student'),
     path('students/import/', views.import_students, name='import_students'),
+    path('students/import/<int:import_id>/status/', views.import_status, name='import_status'),
     path('students/export/', views.export_students, name='export_students'),
     path('students/<str:admission_number>/', views.view_student, name='view_student'),
     path('students/<str:admission_number>/edit/', views.edit_student, name='edit_student'),
     path('settings/', views.system_settings, name='system_settings'),
     path('settings/create/', views.create_setting, name='create_setting'),
     path('logs/', views.activity_logs, name='activity_logs'),
+    path('metrics/', views.metrics, name='metrics'),
     path('attendance-records/', views.attendance_records_list, name='attendance_records_list'),
     path('profile/', views.admin_profile, name='admin_profile'),
     path('profile/edit/', views.edit_admin_profile, name='edit_admin_profile'),
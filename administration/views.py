@@ -11,40 +11,36 @@ from django.contrib import messages
 from django.db.models import Count
 from django.http import JsonResponse, HttpResponse
 from django.utils import timezone
-import csv
-import io
+from django.conf import settings
 from django.contrib.auth.forms import PasswordChangeForm
 from django.contrib.auth import update_session_auth_hash
 
 from .models import SystemSettings, AdminLog, StudentImportLog
+from .importers import import_student_csv, ImportFormatError
+from .jobs import enqueue_student_import, job_status
 from core.models import Course, ClassSession
 from attendance.models import Student, AttendanceRecord
 from faculty.models import FacultyProfile, CourseAssignment
+from core import metrics as runtime_metrics
+from core.exports import csv_response, EXPORT_CHUNK_SIZE
+from core.filters import date_range, filter_date_range
+from core.pagination import keyset_paginate, filter_query
+from . import audit, counters, retention
 
 # Helper function to check if user is admin
 def is_admin(user):
     return user.is_staff or user.is_superuser
 
-# Log admin actions
+# Log admin actions; entries are queued and written in batches (see audit.py)
 def log_admin_action(request, action, object_type, object_id=None, details=None):
-    AdminLog.objects.create(
-        admin=request.user,
-        action=action,
-        object_type=object_type,
-        object_id=str(object_id) if object_id else None,
-        details=details,
-    )
+    audit.record(request.user, action, object_type, object_id, details)
 
 @login_required
 @user_passes_test(is_admin)
 def dashboard(request):
     """Admin dashboard with system overview and recent activity."""
-    # Count records
-    student_count = Student.objects.count()
-    course_count = Course.objects.count()
-    faculty_count = FacultyProfile.objects.count()
-    session_count = ClassSession.objects.count()
-    attendance_count = AttendanceRecord.objects.count()
+    # Count records from the counter cache instead of five COUNT(*) queries per load
+    counts = counters.get_counts()
     
     # Recent activity
     recent_sessions = ClassSession.objects.order_by('-created_at')[:5]
@@ -65,11 +61,13 @@ def dashboard(request):
     if filter_faculty:
         attendance_records = attendance_records.filter(session__faculty__username=filter_faculty)
 
-    if filter_date_start:
-        attendance_records = attendance_records.filter(timestamp__date__gte=filter_date_start)
+    # Local dates become a timestamp range, which the timestamp index can serve
+    attendance_records = filter_date_range(attendance_records, 'timestamp', filter_date_start, filter_date_end)
 
-    if filter_date_end:
-        attendance_records = attendance_records.filter(timestamp__date__lte=filter_date_end)
+    # Seek from the cursor in the URL, newest first, so any page costs the same as the first
+    attendance_page = keyset_paginate(
+        attendance_records, ['-timestamp', '-id'], request.GET.get('after'), request.GET.get('before'),
+    )
 
     # Fetch unique courses and faculty for filter options
     courses = Course.objects.all()
@@ -77,15 +75,12 @@ def dashboard(request):
 
     # Add attendance records and filter options to context
     context = {
-        'student_count': student_count,
-        'course_count': course_count,
-        'faculty_count': faculty_count,
-        'session_count': session_count,
-        'attendance_count': attendance_count,
+        **counts,
         'recent_sessions': recent_sessions,
         'recent_attendance': recent_attendance,
         'recent_logs': recent_logs,
-        'attendance_records': attendance_records,
+        'attendance_records': attendance_page,
+        'filter_query': filter_query(request),
         'courses': courses,
         'faculty_users': faculty_users,
     }
@@ -96,11 +91,8 @@ def dashboard(request):
 @user_passes_test(is_admin)
 def faculty_list(request):
     """Display and manage all faculty users."""
-    faculties = FacultyProfile.objects.all().select_related('user')
-    
-    # Calculate course assignments for each faculty
-    for faculty in faculties:
-        faculty.course_count = CourseAssignment.objects.filter(faculty=faculty).count()
+    # Course assignments are counted in the same query
+    faculties = FacultyProfile.objects.all().select_related('user').with_course_counts()
     
     context = {
         'faculties': faculties,
@@ -224,12 +216,8 @@ def assign_course(request, faculty_id):
 @user_passes_test(is_admin)
 def course_list(request):
     """Manage courses"""
-    courses = Course.objects.all()
-    
-    # Calculate statistics for each course
-    for course in courses:
-        course.session_count = ClassSession.objects.filter(course=course).count()
-        course.faculty_count = CourseAssignment.objects.filter(course=course).count()
+    # Session and faculty counts are calculated in the same query
+    courses = Course.objects.with_session_counts()
     
     context = {
         'courses': courses,
@@ -346,11 +334,8 @@ def course_detail(request, course_id):
 @user_passes_test(is_admin)
 def student_list(request):
     """Manage students"""
-    students = Student.objects.all()
-    
-    # Count attendance records for each student
-    for student in students:
-        student.attendance_count = AttendanceRecord.objects.filter(student=student).count()
+    # Attendance records are counted in the same query
+    students = Student.objects.with_attendance_counts()
     
     context = {
         'students': students,
@@ -433,6 +418,12 @@ def import_students(request):
             messages.error(request, 'Please upload a valid CSV file.')
             return redirect('administration:import_students')
         
+        if getattr(settings, 'STUDENT_IMPORT_BACKGROUND', True):
+            # Hand the file to a worker and return at once; the page polls import_status for progress
+            import_log = enqueue_student_import(csv_file, request.user)
+            messages.success(request, f'{csv_file.name} has been queued for import.')
+            return redirect('administration:import_students')
+
         # Create import log
         import_log = StudentImportLog.objects.create(
             admin=request.user,
@@ -440,80 +431,34 @@ def import_students(request):
             status='PROCESSING'
         )
         
-        # Process CSV
+        # Process CSV in chunks, streaming the upload instead of reading it into memory
         try:
-            decoded_file = csv_file.read().decode('utf-8')
-            io_string = io.StringIO(decoded_file)
-            reader = csv.reader(io_string)
-            header = next(reader)  # Skip header row
-            
-            # Check required columns
-            required_columns = ['admission_number', 'first_name', 'last_name']
-            if not all(column in header for column in required_columns):
-                import_log.status = 'FAILED'
-                import_log.error_log = 'Missing required columns. CSV must contain: admission_number, first_name, last_name'
-                import_log.save()
-                messages.error(request, 'CSV format is invalid. Missing required columns.')
-                return redirect('administration:import_students')
-            
-            # Get column indexes
-            admission_number_idx = header.index('admission_number')
-            first_name_idx = header.index('first_name')
-            last_name_idx = header.index('last_name')
-            
-            # Process rows
-            records_total = 0
-            records_imported = 0
-            records_failed = 0
-            error_log = []
-            
-            for row in reader:
-                records_total += 1
-                try:
-                    if len(row) >= max(admission_number_idx, first_name_idx, last_name_idx) + 1:
-                        admission_number = row[admission_number_idx]
-                        first_name = row[first_name_idx]
-                        last_name = row[last_name_idx]
-                        
-                        # Create or update student
-                        student, created = Student.objects.update_or_create(
-                            admission_number=admission_number,
-                            defaults={
-                                'first_name': first_name,
-                                'last_name': last_name
-                            }
-                        )
-                        records_imported += 1
-                    else:
-                        error_log.append(f'Row {records_total}: Invalid format, missing fields')
-                        records_failed += 1
-                except Exception as e:
-                    error_log.append(f'Row {records_total}: {str(e)}')
-                    records_failed += 1
-            
-            # Update import log
-            import_log.status = 'COMPLETED'
-            import_log.records_total = records_total
-            import_log.records_imported = records_imported
-            import_log.records_failed = records_failed
-            import_log.error_log = '\n'.join(error_log)
+            import_student_csv(csv_file.file, import_log)
+        except ImportFormatError as e:
+            import_log.status = 'FAILED'
+            import_log.error_log = str(e)
             import_log.save()
-            
+            messages.error(request, 'CSV format is invalid. Missing required columns.')
+            return redirect('administration:import_students')
+        except Exception as e:
+            import_log.status = 'FAILED'
+            import_log.error_log = str(e)
+            import_log.save()
+            messages.error(request, f'Error processing CSV: {str(e)}')
+        else:
+            import_log.status = 'COMPLETED'
+            import_log.save(update_fields=['status'])
+
             # Log action
             log_admin_action(
                 request, 
                 'IMPORT', 
                 'Student', 
                 None, 
-                f'Imported {records_imported} students from {csv_file.name}'
+                f'Imported {import_log.records_imported} students from {csv_file.name}'
             )
             
-            messages.success(request, f'Successfully imported {records_imported} students. {records_failed} failed.')
-        except Exception as e:
-            import_log.status = 'FAILED'
-            import_log.error_log = str(e)
-            import_log.save()
-            messages.error(request, f'Error processing CSV: {str(e)}')
+            messages.success(request, f'Successfully imported {import_log.records_imported} students. {import_log.records_failed} failed.')
         
         return redirect('administration:student_list')
     
@@ -522,36 +467,40 @@ def import_students(request):
     
     context = {
         'import_logs': import_logs,
+        'active_jobs': [log.id for log in import_logs if log.status in ('PENDING', 'PROCESSING')],
     }
     
     return render(request, 'administration/import_students.html', context)
 
+@login_required
+@user_passes_test(is_admin)
+def import_status(request, import_id):
+    """Return an import's progress as JSON for the import page to poll."""
+    import_log = get_object_or_404(StudentImportLog.objects.only(
+        'filename', 'status', 'records_total', 'records_imported', 'records_failed'), id=import_id)
+    return JsonResponse(job_status(import_log))
+
 @login_required
 @user_passes_test(is_admin)
 def export_students(request):
-    """Export students to CSV"""
-    # Create CSV response
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = 'attachment; filename="students.csv"'
-    
-    # Write CSV
-    writer = csv.writer(response)
-    writer.writerow(['admission_number', 'first_name', 'last_name'])
-    
-    students = Student.objects.all()
-    for student in students:
-        writer.writerow([student.admission_number, student.first_name, student.last_name])
-    
-    # Log action
+    """Export students to CSV, streamed from the database as it is read"""
+    # Log action before streaming, so an aborted download is still audited; the count is the
+    # dashboard's cached counter rather than a COUNT(*) ahead of the first byte
+    student_count = counters.get_counts(['student_count'])['student_count']
     log_admin_action(
         request, 
         'EXPORT', 
         'Student', 
         None, 
-        f'Exported {students.count()} students'
+        f'Exported {student_count} students'
     )
     
-    return response
+    def rows():
+        yield ['admission_number', 'first_name', 'last_name']
+        students = Student.objects.values_list('admission_number', 'first_name', 'last_name')
+        yield from students.iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    
+    return csv_response(rows(), 'students.csv')
 
 @login_required
 @user_passes_test(is_admin)
@@ -639,17 +588,25 @@ def activity_logs(request):
     if filter_user:
         logs = logs.filter(admin__username=filter_user)
         
-    if filter_date_start:
-        logs = logs.filter(timestamp__date__gte=filter_date_start)
-        
-    if filter_date_end:
-        logs = logs.filter(timestamp__date__lte=filter_date_end)
+    logs = filter_date_range(logs, 'timestamp', filter_date_start, filter_date_end)
     
     # Get unique users for filter
     admin_users = User.objects.filter(admin_logs__isnull=False).distinct()
     
+    # Pages of 100, newest first, cut at a cursor rather than an offset
+    since, until = date_range(filter_date_start, filter_date_end)
+    if retention.reaches_archive(since, until):
+        logs = retention.activity_log_page(
+            logs, since, until, filter_action, filter_user,
+            request.GET.get('after'), request.GET.get('before'), per_page=100,
+        )
+    else:
+        logs = keyset_paginate(logs, ['-timestamp', '-id'], request.GET.get('after'), request.GET.get('before'), per_page=100)
+    
     context = {
-        'logs': logs[:100],  # Limit to last 100 logs for performance
+        'logs': logs,
+        'retention_days': retention.RETENTION_DAYS,
+        'filter_query': filter_query(request),
         'admin_users': admin_users,
         'action_choices': AdminLog.ACTION_CHOICES,
         'filter_action': filter_action,
@@ -685,12 +642,11 @@ def session_list(request):
     if filter_date_end:
         sessions = sessions.filter(date__lte=filter_date_end)
     
-    # Order by date and time
-    sessions = sessions.order_by('-date', '-start_time')
-    
-    # Count attendance for each session
-    for session in sessions:
-        session.attendance_count = AttendanceRecord.objects.filter(session=session).count()
+    # Order by date and time, counting attendance in the same query
+    sessions = keyset_paginate(
+        sessions.with_attendance_counts(), ['-date', '-start_time', '-id'],
+        request.GET.get('after'), request.GET.get('before'), per_page=50,
+    )
     
     # Get unique courses and faculty for filters
     courses = Course.objects.all()
@@ -698,6 +654,7 @@ def session_list(request):
     
     context = {
         'sessions': sessions,
+        'filter_query': filter_query(request),
         'courses': courses,
         'faculty_users': faculty_users,
         'filter_course': filter_course,
@@ -740,17 +697,18 @@ def attendance_records_list(request):
         attendance_records = attendance_records.filter(session__course__course_code=filter_course)
     if filter_faculty:
         attendance_records = attendance_records.filter(session__faculty__username=filter_faculty)
-    if filter_date_start:
-        attendance_records = attendance_records.filter(timestamp__date__gte=filter_date_start)
-    if filter_date_end:
-        attendance_records = attendance_records.filter(timestamp__date__lte=filter_date_end)
-    attendance_records = attendance_records.order_by('-timestamp')
+    attendance_records = filter_date_range(attendance_records, 'timestamp', filter_date_start, filter_date_end)
+    # Seek from the cursor in the URL, so any page costs the same as the first
+    attendance_records = keyset_paginate(
+        attendance_records, ['-timestamp', '-id'], request.GET.get('after'), request.GET.get('before'), per_page=50,
+    )
 
     courses = Course.objects.all()
     faculty_users = User.objects.filter(sessions__isnull=False).distinct()
 
     context = {
         'attendance_records': attendance_records,
+        'filter_query': filter_query(request),
         'courses': courses,
         'faculty_users': faculty_users,
         'filter_course': filter_course,
@@ -760,6 +718,12 @@ def attendance_records_list(request):
     }
     return render(request, 'administration/attendance_records.html', context)
 
+@login_required
+@user_passes_test(is_admin)
+def metrics(request):
+    """Return this worker's in-process cache and queue metrics as JSON for monitoring."""
+    return JsonResponse(runtime_metrics.snapshot())
+
 @login_required
 @user_passes_test(is_admin)
 def reset_faculty_password(request, faculty_id):
@@ -0,0 +1,14 @@
+"""
+App configuration for the attendance app.
+Connects the signal handlers that keep in-memory attendance caches in sync.
+"""
+
+from django.apps import AppConfig
+
+
+class AttendanceConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'attendance'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,59 @@
+"""
+Cached per-session attendance counts for the attendance app.
+Each session's count lives under its own cache key in the ATTENDANCE_COUNT_CACHE cache: new and
+deleted records move it with cache.incr, and it is recounted with one COUNT(*) when missing or once
+ATTENDANCE_COUNT_TTL expires, which also corrects drift from other processes' local-memory caches.
+On backends without an atomic incr (file-based, database) writers delete the count instead.
+"""
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import BaseCache
+
+from core import metrics
+from .models import AttendanceRecord
+
+COUNT_TTL = getattr(settings, 'ATTENDANCE_COUNT_TTL', 30)
+
+
+def _cache():
+    return caches[getattr(settings, 'ATTENDANCE_COUNT_CACHE', 'default')]
+
+
+def _key(session_id):
+    return f'attendance_count:{session_id}'
+
+
+def session_count(session_id):
+    """Return the session's attendance count, recounting only when it is not cached."""
+    cache = _cache()
+    value = cache.get(_key(session_id))
+    if value is None:
+        metrics.incr('attendance_count.misses')
+        value = AttendanceRecord.objects.filter(session_id=session_id).count()
+        # add() rather than set(): a counter another request created meanwhile is at least as fresh
+        cache.add(_key(session_id), value, COUNT_TTL)
+    return value
+
+
+def _atomic_incr(cache):
+    """Whether the backend increments in one step; BaseCache.incr is a get() then a set()."""
+    return type(cache).incr is not BaseCache.incr
+
+
+def adjust(session_id, delta):
+    """Move the session's count by delta, if it is currently cached."""
+    cache = _cache()
+    if not _atomic_incr(cache):
+        # Two processes incrementing at once would lose one of the updates; recounting is always exact
+        cache.delete(_key(session_id))
+        return
+    try:
+        cache.incr(_key(session_id), delta)
+    except ValueError:
+        # Not cached; the next read counts it afresh
+        pass
+
+
+def invalidate(session_id):
+    _cache().delete(_key(session_id))
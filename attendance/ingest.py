@@ -0,0 +1,176 @@
+"""
+Buffered attendance ingest for the attendance app.
+When ATTENDANCE_BUFFERED_INGEST is on, accepted marks are acknowledged immediately, queued in
+process and written with bulk_create(ignore_conflicts=True) every N records or M milliseconds.
+
+Duplicate detection stays correct across flushes because each worker keeps the set of students
+and IP addresses already claimed per session (seeded once from the database). Those claims are
+per process: with several workers, two phones on one IP (or one student twice) can both be
+acknowledged, and the unique constraints drop the later mark at flush time. Such marks are logged
+and counted as attendance_ingest.dropped, but the student was already told it was recorded, so
+run buffered ingest in a single process or with sticky routing per session.
+"""
+
+from collections import Counter
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core import metrics
+from core.batching import BatchWriter, drain_spool
+from core.pubsub import hub, session_channel
+from . import counters, summaries
+from .models import AttendanceRecord
+
+logger = logging.getLogger(__name__)
+
+ENABLED = getattr(settings, 'ATTENDANCE_BUFFERED_INGEST', False)
+BATCH_SIZE = getattr(settings, 'ATTENDANCE_INGEST_BATCH_SIZE', 200)
+FLUSH_MS = getattr(settings, 'ATTENDANCE_INGEST_FLUSH_MS', 250)
+SPOOL_DIR = getattr(settings, 'ATTENDANCE_INGEST_SPOOL_DIR', None)
+
+# Claims for sessions idle this long are dropped and reseeded from the database on next use
+CLAIM_IDLE_SECONDS = 3600
+
+DUPLICATE_STUDENT = 'student'
+DUPLICATE_IP = 'ip'
+
+
+def serialize(record):
+    return {
+        'session_id': record.session_id,
+        'student_id': record.student_id,
+        'ip_address': record.ip_address,
+        'timestamp': record.timestamp.isoformat(),
+    }
+
+
+def deserialize(data):
+    return AttendanceRecord(
+        session_id=data['session_id'],
+        student_id=data['student_id'],
+        ip_address=data['ip_address'],
+        timestamp=parse_datetime(data['timestamp']),
+    )
+
+
+def _written(records):
+    """The records of a bulk_create(ignore_conflicts=True) batch that made it into the table."""
+    stored = set(AttendanceRecord.objects.filter(
+        session_id__in={r.session_id for r in records},
+        student_id__in={r.student_id for r in records},
+    ).values_list('session_id', 'student_id', 'timestamp'))
+    return [r for r in records if (r.session_id, r.student_id, r.timestamp) in stored]
+
+
+def write_records(records):
+    """Insert a batch of records, letting the unique constraints drop duplicates; returns those written."""
+    with transaction.atomic():
+        AttendanceRecord.objects.bulk_create(records, ignore_conflicts=True)
+        written = _written(records)
+        # bulk_create sends no post_save, so recount the students the batch touched
+        summaries.records_added(written)
+    if len(written) < len(records):
+        # Marks acknowledged by another worker's claims first; these students were told they were recorded
+        kept = set(map(id, written))
+        for record in records:
+            if id(record) not in kept:
+                logger.warning('Dropped acknowledged mark for %s in session %s from %s: already marked',
+                               record.student_id, record.session_id, record.ip_address)
+        metrics.incr('attendance_ingest.dropped', len(records) - len(written))
+    # and move the session counts by what was actually inserted
+    for session_id, added in Counter(record.session_id for record in written).items():
+        counters.adjust(session_id, added)
+    return written
+
+
+class AttendanceIngest:
+    """Admits marks against per-session claims and hands accepted ones to a BatchWriter."""
+
+    def __init__(self):
+        self._claims = {}
+        self._lock = threading.Lock()
+        self.writer = BatchWriter(
+            'attendance_ingest',
+            self._flush,
+            batch_size=BATCH_SIZE,
+            flush_interval_ms=FLUSH_MS,
+            spool_dir=SPOOL_DIR,
+            serialize=serialize,
+        )
+
+    def accept(self, session_id, admission_number, ip_address):
+        """Queue a mark; returns None when accepted or the kind of duplicate that blocked it."""
+        with self._lock:
+            students, ips, _ = self._claims_for(session_id)
+            if admission_number in students:
+                return DUPLICATE_STUDENT
+            if ip_address and ip_address in ips:
+                return DUPLICATE_IP
+            students.add(admission_number)
+            if ip_address:
+                ips.add(ip_address)
+            self._claims[session_id][2] = time.monotonic()
+            self.writer.put(AttendanceRecord(
+                session_id=session_id,
+                student_id=admission_number,
+                ip_address=ip_address,
+                timestamp=timezone.now(),
+            ))
+        return None
+
+    def _claims_for(self, session_id):
+        claims = self._claims.get(session_id)
+        if claims is None:
+            students, ips = set(), set()
+            for student_id, ip_address in AttendanceRecord.objects.filter(
+                session_id=session_id
+            ).values_list('student_id', 'ip_address'):
+                students.add(student_id)
+                if ip_address:
+                    ips.add(ip_address)
+            claims = self._claims[session_id] = [students, ips, time.monotonic()]
+        return claims
+
+    def _flush(self, records):
+        write_records(records)
+        # bulk_create sends no post_save, so announce the batch to live streams here
+        for session_id in {record.session_id for record in records}:
+            hub.publish(session_channel(session_id))
+        # Claims are only safe to drop once nothing for the session is left in the queue
+        cutoff = time.monotonic() - CLAIM_IDLE_SECONDS
+        with self._lock:
+            for session_id in [s for s, claims in self._claims.items() if claims[2] < cutoff]:
+                del self._claims[session_id]
+
+    def flush(self):
+        self.writer.flush()
+
+
+def write_surviving_records(records):
+    """Like write_records, but skips marks whose session or student has since been deleted."""
+    from core.models import ClassSession
+    from .models import Student
+
+    session_ids = set(ClassSession.objects.filter(
+        id__in={r.session_id for r in records}
+    ).values_list('id', flat=True))
+    student_ids = set(Student.objects.filter(
+        admission_number__in={r.student_id for r in records}
+    ).values_list('admission_number', flat=True))
+    write_records([r for r in records if r.session_id in session_ids and r.student_id in student_ids])
+
+
+def drain():
+    """Write out marks spooled by workers that stopped before flushing them."""
+    if SPOOL_DIR is None:
+        return 0
+    return drain_spool('attendance_ingest', SPOOL_DIR, deserialize, write_surviving_records)
+
+
+ingest = AttendanceIngest() if ENABLED else None
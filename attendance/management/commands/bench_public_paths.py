@@ -0,0 +1,78 @@
+"""
+Management command that measures the per-request cost of the middleware on the public attendance pages.
+Sends the same sequence of mark-page loads and submissions through the full MIDDLEWARE chain and
+with LIGHTWEIGHT_PATHS skipping the session, auth, messages and CSRF middleware, from a client
+holding a session cookie, and reports latency and queries per request for each.
+"""
+
+import json
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from core.benchmarks import synthetic_session, summarize
+
+
+class Command(BaseCommand):
+    help = 'Compare mark/submit request overhead through the full and the lightweight middleware chains.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300, help='Requests per endpoint and chain')
+        parser.add_argument('--json', action='store_true', help='Print the results as a single JSON object')
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        results = []
+        # Submissions, not the limiter, are what is being timed
+        with override_settings(ATTENDANCE_SUBMIT_RATE_LIMITS={}), synthetic_session(total * 2) as (session, admission_numbers):
+            students = iter(admission_numbers)
+            for chain, paths in (('full', []), ('lightweight', settings.LIGHTWEIGHT_PATHS)):
+                with override_settings(LIGHTWEIGHT_PATHS=paths):
+                    # A fresh client builds its middleware from the overridden settings
+                    client = Client()
+                    # Like a phone that already holds a session, e.g. from the enrollment form
+                    store = SessionStore()
+                    store['bench'] = True
+                    store.create()
+                    client.cookies[settings.SESSION_COOKIE_NAME] = store.session_key
+                    try:
+                        results.append(self._measure(chain, 'mark', total, lambda i: client.get(
+                            f'/attendance/mark/{session.session_key}/')))
+                        results.append(self._measure(chain, 'submit', total, lambda i: client.post(
+                            f'/attendance/submit/{session.session_key}/',
+                            json.dumps({'admission_number': next(students)}),
+                            content_type='application/json',
+                            REMOTE_ADDR=f'10.{(i >> 8) & 255}.{i & 255}.{1 if chain == "full" else 2}',
+                        )))
+                    finally:
+                        store.delete()
+
+        if options['json']:
+            self.stdout.write(json.dumps(results))
+            return
+        self.stdout.write(f'{"endpoint":<10}{"chain":<13}{"p50 ms":>9}{"p99 ms":>9}{"mean ms":>9}{"queries":>9}')
+        for r in results:
+            self.stdout.write(
+                f'{r["endpoint"]:<10}{r["chain"]:<13}{r["p50_ms"]:>9.2f}{r["p99_ms"]:>9.2f}'
+                f'{r["mean_ms"]:>9.2f}{r["queries_per_request"]:>9.1f}'
+            )
+
+    def _measure(self, chain, endpoint, total, send):
+        latencies, queries, statuses = [], 0, set()
+        for i in range(total):
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = send(i)
+                latencies.append(time.perf_counter() - start)
+            queries += len(ctx.captured_queries)
+            statuses.add(response.status_code)
+        if statuses != {200}:
+            self.stderr.write(f'{endpoint} via {chain}: unexpected status codes {sorted(statuses)}')
+        result = summarize(latencies)
+        result.update({'chain': chain, 'endpoint': endpoint, 'queries_per_request': queries / total})
+        return result
@@ -0,0 +1,94 @@
+"""
+Management command to load-test attendance submission.
+Fires N concurrent submissions at one synthetic session and reports latency and queries per request.
+"""
+
+import itertools
+import json
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext, override_settings
+
+from attendance import ingest
+from core.benchmarks import synthetic_session, summarize
+
+
+class Command(BaseCommand):
+    help = 'Fire N concurrent attendance submissions at one session and report p50/p99 latency and query count per request.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=400, help='Number of submissions (one per student)')
+        parser.add_argument('--concurrency', type=int, default=32, help='Number of client threads')
+        parser.add_argument('--rate-limits', action='store_true',
+                            help='Keep ATTENDANCE_SUBMIT_RATE_LIMITS on; by default the burst measures the submission path alone')
+        parser.add_argument('--json', action='store_true', help='Print the results as a single JSON object')
+
+    def handle(self, *args, **options):
+        total = options['requests']
+        concurrency = options['concurrency']
+
+        limits = settings.ATTENDANCE_SUBMIT_RATE_LIMITS if options['rate_limits'] else {}
+        with override_settings(ATTENDANCE_SUBMIT_RATE_LIMITS=limits), synthetic_session(total) as (session, admission_numbers):
+            url = f'/attendance/submit/{session.session_key}/'
+            counter = itertools.count()
+            lock = threading.Lock()
+            latencies, query_counts, statuses = [], [], Counter()
+
+            def worker():
+                client = Client()
+                try:
+                    while True:
+                        i = next(counter)
+                        if i >= total:
+                            break
+                        body = json.dumps({'admission_number': admission_numbers[i]})
+                        # Every student submits from its own address so the IP check never trips
+                        remote_addr = f'10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}'
+                        with CaptureQueriesContext(connection) as ctx:
+                            start = time.perf_counter()
+                            response = client.post(url, body, content_type='application/json', REMOTE_ADDR=remote_addr)
+                            elapsed = time.perf_counter() - start
+                        with lock:
+                            latencies.append(elapsed)
+                            query_counts.append(len(ctx.captured_queries))
+                            statuses[response.status_code] += 1
+                finally:
+                    connection.close()
+
+            threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            wall = time.perf_counter() - started
+
+            if ingest.ingest is not None:
+                # Buffered marks must reach the database before the fixture is torn down
+                ingest.ingest.flush()
+
+        results = summarize(latencies)
+        results.update({
+            'concurrency': concurrency,
+            'wall_s': wall,
+            'throughput_rps': len(latencies) / wall if wall else 0.0,
+            'queries_per_request_avg': sum(query_counts) / len(query_counts) if query_counts else 0.0,
+            'queries_per_request_max': max(query_counts) if query_counts else 0,
+            'statuses': dict(statuses),
+        })
+
+        if options['json']:
+            self.stdout.write(json.dumps(results))
+            return
+
+        self.stdout.write(f"Submissions:       {results['count']} ({concurrency} concurrent)")
+        self.stdout.write(f"Latency p50/p99:   {results['p50_ms']:.1f} ms / {results['p99_ms']:.1f} ms (max {results['max_ms']:.1f} ms)")
+        self.stdout.write(f"Throughput:        {results['throughput_rps']:.0f} req/s over {wall:.2f} s")
+        self.stdout.write(f"Queries/request:   {results['queries_per_request_avg']:.2f} avg, {results['queries_per_request_max']} max")
+        self.stdout.write(f"Status codes:      {dict(statuses)}")
@@ -0,0 +1,19 @@
+"""
+Management command to drain the buffered attendance ingest queue.
+Run it after workers have stopped to write any marks they spooled but never flushed.
+"""
+
+from django.core.management.base import BaseCommand
+
+from attendance import ingest
+
+
+class Command(BaseCommand):
+    help = 'Write attendance marks left in the buffered ingest spool by stopped workers.'
+
+    def handle(self, *args, **options):
+        if ingest.ingest is not None:
+            # Anything queued in this process goes first
+            ingest.ingest.flush()
+        drained = ingest.drain()
+        self.stdout.write(self.style.SUCCESS(f'Drained {drained} spooled attendance marks.'))
@@ -0,0 +1,32 @@
+"""
+Management command that reconciles the AttendanceSummary table from scratch.
+Recounts every (student, course) pair from attendance records, enrollments and sessions,
+replacing rows that drifted and removing rows that no longer apply.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.models import Course
+from attendance import summaries
+
+
+class Command(BaseCommand):
+    help = 'Recompute attendance summaries for every course, or only the given course codes.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('course_codes', nargs='*', help='Only rebuild these courses')
+
+    def handle(self, *args, **options):
+        if not options['course_codes']:
+            rows = summaries.refresh()
+            self.stdout.write(self.style.SUCCESS(f'Rebuilt {rows} attendance summaries.'))
+            return
+
+        courses = dict(Course.objects.filter(course_code__in=options['course_codes']).values_list('course_code', 'id'))
+        missing = set(options['course_codes']) - set(courses)
+        if missing:
+            raise CommandError(f'Unknown course codes: {", ".join(sorted(missing))}')
+        for code, course_id in courses.items():
+            rows = summaries.refresh(course_id)
+            self.stdout.write(f'{code}: {rows} summaries')
+        self.stdout.write(self.style.SUCCESS('Done.'))
@@ -0,0 +1,35 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:03
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def remove_duplicate_ips(apps, schema_editor):
+    """Keep only the earliest record of each (session, ip_address) pair, so the constraint can be added."""
+    AttendanceRecord = apps.get_model('attendance', 'AttendanceRecord')
+    duplicated = (
+        AttendanceRecord.objects.filter(ip_address__isnull=False).order_by()
+        .values('session_id', 'ip_address').annotate(n=Count('id')).filter(n__gt=1)
+        .values_list('session_id', 'ip_address')
+    )
+    for session_id, ip_address in list(duplicated):
+        ids = list(
+            AttendanceRecord.objects.filter(session_id=session_id, ip_address=ip_address)
+            .order_by('timestamp', 'id').values_list('id', flat=True)
+        )
+        AttendanceRecord.objects.filter(id__in=ids[1:]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0005_attendancerecord_ip_address'),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicate_ips, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='attendancerecord',
+            constraint=models.UniqueConstraint(condition=models.Q(('ip_address__isnull', False)), fields=('session', 'ip_address'), name='unique_attendance_ip_per_session'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0006_attendancerecord_unique_ip_per_session'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['student', 'session'], name='attendance_student_session_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['timestamp'], name='attendance_timestamp_idx'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_hot_path_indexes'),
+        ('attendance', '0007_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AttendanceSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('attended', models.PositiveIntegerField(default=0)),
+                ('sessions_held', models.PositiveIntegerField(default=0)),
+                ('percentage', models.FloatField(default=0)),
+                ('last_seen', models.DateTimeField(blank=True, null=True)),
+                ('course', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='core.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attendance_summaries', to='attendance.student')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='attendancesummary',
+            constraint=models.UniqueConstraint(fields=('student', 'course'), name='unique_attendance_summary'),
+        ),
+    ]
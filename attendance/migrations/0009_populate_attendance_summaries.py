@@ -0,0 +1,44 @@
+from collections import Counter
+
+from django.db import migrations
+from django.db.models import Count, Max
+
+
+def populate(apps, schema_editor):
+    """Fill the summary table from existing records and enrollments (the same counts as a full rebuild)."""
+    ClassSession = apps.get_model('core', 'ClassSession')
+    Enrollment = apps.get_model('core', 'Enrollment')
+    AttendanceRecord = apps.get_model('attendance', 'AttendanceRecord')
+    AttendanceSummary = apps.get_model('attendance', 'AttendanceSummary')
+
+    held = Counter(dict(
+        ClassSession.objects.order_by().values('course_id').annotate(n=Count('id')).values_list('course_id', 'n')
+    ))
+    stats = {
+        (student_id, course_id): (attended, last_seen)
+        for student_id, course_id, attended, last_seen in AttendanceRecord.objects.order_by()
+        .values('student_id', 'session__course_id')
+        .annotate(attended=Count('id'), last_seen=Max('timestamp'))
+        .values_list('student_id', 'session__course_id', 'attended', 'last_seen')
+    }
+    pairs = set(stats) | set(Enrollment.objects.values_list('student_id', 'course_id'))
+    rows = []
+    for student_id, course_id in pairs:
+        attended, last_seen = stats.get((student_id, course_id), (0, None))
+        sessions_held = held[course_id]
+        rows.append(AttendanceSummary(
+            student_id=student_id, course_id=course_id, attended=attended, sessions_held=sessions_held,
+            percentage=100.0 * attended / sessions_held if sessions_held else 0.0, last_seen=last_seen,
+        ))
+    AttendanceSummary.objects.bulk_create(rows, batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0008_attendancesummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0009_populate_attendance_summaries'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='attendancerecord',
+            name='attendance_timestamp_idx',
+        ),
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['timestamp', 'id'], name='attendance_timestamp_idx'),
+        ),
+    ]
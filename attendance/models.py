@@ -6,6 +6,12 @@ Defines Student and AttendanceRecord models for tracking attendance.
 from django.db import models
 from django.utils import timezone
 from django.utils.timezone import localtime
+from django.db.models.functions import Coalesce
+
+class StudentQuerySet(models.QuerySet):
+    def with_attendance_counts(self):
+        """Annotate attendance_count by summing the student's precomputed per-course summaries."""
+        return self.annotate(attendance_count=Coalesce(models.Sum('attendance_summaries__attended'), 0))
 
 class Student(models.Model):
     """Model representing a student with admission number and name."""
@@ -13,6 +19,8 @@ class Student(models.Model):
     first_name = models.CharField(max_length=100)
     last_name = models.CharField(max_length=100)
     
+    objects = StudentQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.admission_number} - {self.first_name} {self.last_name}"
 
@@ -31,10 +39,41 @@ class AttendanceRecord(models.Model):
     
     class Meta:
         unique_together = ['session', 'student']  # Prevent duplicate attendance
-        
+        constraints = [
+            # One mark per device/network per session, enforced at insert time
+            models.UniqueConstraint(
+                fields=['session', 'ip_address'],
+                condition=models.Q(ip_address__isnull=False),
+                name='unique_attendance_ip_per_session',
+            ),
+        ]
+        indexes = [
+            # A student's history per course joins through session
+            models.Index(fields=['student', 'session'], name='attendance_student_session_idx'),
+            # Admin lists seek on (timestamp, id); date filters range over timestamp
+            models.Index(fields=['timestamp', 'id'], name='attendance_timestamp_idx'),
+        ]
+
     def save(self, *args, **kwargs):
         self.timestamp = localtime()
         super().save(*args, **kwargs)
         
     def __str__(self):
         return f"{self.student} - {self.session} - {'✓' if self.is_verified else '✗'}"
+
+class AttendanceSummary(models.Model):
+    """Precomputed attendance of one student in one course, kept current by attendance.summaries."""
+    student = models.ForeignKey(Student, on_delete=models.CASCADE, related_name='attendance_summaries')
+    course = models.ForeignKey('core.Course', on_delete=models.CASCADE, related_name='attendance_summaries')
+    attended = models.PositiveIntegerField(default=0)
+    sessions_held = models.PositiveIntegerField(default=0)
+    percentage = models.FloatField(default=0)
+    last_seen = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'course'], name='unique_attendance_summary'),
+        ]
+
+    def __str__(self):
+        return f"{self.student_id} - {self.course_id}: {self.attended}/{self.sessions_held}"
@@ -0,0 +1,80 @@
+"""
+Session roster cache for the attendance app.
+Holds the approved admission numbers of each active session in memory, keyed by session_key,
+so submissions can check eligibility without touching the database. Entries may be up to
+ROSTER_TTL old in other workers, so submissions re-read whether the session is still open.
+"""
+
+import threading
+import time
+
+from django.conf import settings
+
+from core import metrics
+from core.models import ClassSession, Enrollment
+
+# Upper bound on staleness for changes made by other worker processes
+ROSTER_TTL = getattr(settings, 'ATTENDANCE_ROSTER_TTL', 30)
+
+
+class RosterCache:
+    """Per-process cache of (session, frozenset of approved admission numbers) by session_key."""
+
+    def __init__(self, ttl=ROSTER_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        # Bumped by every invalidation, so a reload that raced one does not cache what it read
+        self._generation = 0
+
+    def get(self, session_key):
+        """Return (session, roster) for an active session, or (None, None) if there is none."""
+        entry = self._entries.get(session_key)
+        if entry is not None and time.monotonic() - entry[2] < self.ttl:
+            metrics.incr('roster_cache.hits')
+            return entry[0], entry[1]
+
+        metrics.incr('roster_cache.misses')
+        return self.reload(session_key)
+
+    def reload(self, session_key):
+        """Fetch the session and its approved roster from the database and cache them."""
+        generation = self._generation
+        try:
+            # Only the fields needed to validate a submission are loaded
+            session = ClassSession.objects.only(
+                'id', 'session_key', 'course_id', 'date', 'start_time', 'end_time', 'is_active'
+            ).get(session_key=session_key, is_active=True)
+        except ClassSession.DoesNotExist:
+            self.invalidate_session(session_key)
+            return None, None
+
+        roster = frozenset(
+            Enrollment.objects.filter(course_id=session.course_id, status='approved')
+            .values_list('student_id', flat=True)
+        )
+        with self._lock:
+            if generation == self._generation:
+                self._entries[session_key] = (session, roster, time.monotonic())
+        return session, roster
+
+    def invalidate_session(self, session_key):
+        """Drop a single session from the cache."""
+        with self._lock:
+            self._generation += 1
+            self._entries.pop(session_key, None)
+
+    def invalidate_course(self, course_id):
+        """Drop every cached session of a course, e.g. after an enrollment decision."""
+        with self._lock:
+            self._generation += 1
+            for key in [k for k, entry in self._entries.items() if entry[0].course_id == course_id]:
+                del self._entries[key]
+        metrics.incr('roster_cache.invalidations')
+
+    def __len__(self):
+        return len(self._entries)
+
+
+roster_cache = RosterCache()
+metrics.set_gauge('roster_cache.sessions', lambda: len(roster_cache))
@@ -0,0 +1,106 @@
+"""
+Signal handlers for the attendance app.
+Keeps the session roster cache, the attendance summaries and the per-session counts in step with
+session, enrollment and record changes, and announces new attendance records to live session viewers.
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from core.models import ClassSession, Enrollment
+from core.pubsub import hub, session_channel
+from . import counters, summaries
+from .models import AttendanceRecord, Student
+from .roster import roster_cache
+
+
+@receiver(post_save, sender=ClassSession)
+def load_session_roster(sender, instance, **kwargs):
+    """Preload the roster when a session is created or (re)activated; drop it when deactivated."""
+    if instance.is_active:
+        # Reload from the database: form input may have left string dates on the instance
+        roster_cache.reload(instance.session_key)
+    else:
+        roster_cache.invalidate_session(instance.session_key)
+
+
+@receiver(post_delete, sender=ClassSession)
+def drop_session_roster(sender, instance, **kwargs):
+    roster_cache.invalidate_session(instance.session_key)
+
+
+@receiver(post_save, sender=Enrollment)
+@receiver(post_delete, sender=Enrollment)
+def invalidate_course_roster(sender, instance, **kwargs):
+    """Approvals and rejections change who may attend every session of the course."""
+    roster_cache.invalidate_course(instance.course_id)
+
+
+@receiver(post_save, sender=AttendanceRecord)
+def announce_attendance_record(sender, instance, created, **kwargs):
+    """Wake any live streams for the session once the new record is committed."""
+    if created:
+        channel = session_channel(instance.session_id)
+        transaction.on_commit(lambda: hub.publish(channel))
+
+
+@receiver(post_save, sender=AttendanceRecord)
+def count_attendance_record(sender, instance, created, **kwargs):
+    if created:
+        # Queued only once committed, so the recount is sure to see the record
+        course_id = instance.session.course_id
+        transaction.on_commit(lambda: summaries.record_added(instance, course_id))
+
+
+@receiver(post_delete, sender=AttendanceRecord)
+def uncount_attendance_record(sender, instance, **kwargs):
+    summaries.record_removed(instance)
+
+
+@receiver(post_save, sender=AttendanceRecord)
+def increment_session_count(sender, instance, created, **kwargs):
+    if created:
+        session_id = instance.session_id
+        # A rolled-back record never reaches the counter
+        transaction.on_commit(lambda: counters.adjust(session_id, 1))
+
+
+@receiver(post_delete, sender=AttendanceRecord)
+def decrement_session_count(sender, instance, **kwargs):
+    session_id = instance.session_id
+    transaction.on_commit(lambda: counters.adjust(session_id, -1))
+
+
+@receiver(post_save, sender=ClassSession)
+def count_held_session(sender, instance, created, **kwargs):
+    if created:
+        summaries.session_added(instance)
+
+
+@receiver(pre_delete, sender=ClassSession)
+@receiver(pre_delete, sender=Student)
+def mark_summary_cascade(sender, instance, **kwargs):
+    summaries.deleting('sessions' if sender is ClassSession else 'students', instance.pk)
+
+
+@receiver(post_delete, sender=ClassSession)
+def uncount_held_session(sender, instance, **kwargs):
+    summaries.deleted('sessions', instance.pk)
+    summaries.session_removed(instance)
+
+
+@receiver(post_delete, sender=Student)
+def unmark_deleted_student(sender, instance, **kwargs):
+    summaries.deleted('students', instance.pk)
+
+
+@receiver(post_save, sender=Enrollment)
+def track_enrolled_student(sender, instance, created, **kwargs):
+    if created:
+        summaries.enrollment_added(instance)
+
+
+@receiver(post_delete, sender=Enrollment)
+def untrack_unenrolled_student(sender, instance, **kwargs):
+    summaries.enrollment_removed(instance)
@@ -0,0 +1,67 @@
+"""
+Attendance submission pipeline for the attendance app.
+Checks eligibility against a per-session roster held in memory and lets the database
+constraints reject duplicate marks, so an accepted mark costs a primary-key read of the
+session (which another worker may have ended) and a single INSERT.
+"""
+
+from django.db import IntegrityError, transaction
+
+from core.models import ClassSession
+from .models import AttendanceRecord
+from .roster import roster_cache
+from .ingest import ingest, DUPLICATE_STUDENT
+
+SESSION_NOT_FOUND = 'Session not found or inactive.'
+SESSION_ENDED = 'Attendance marking is not allowed. The session has already ended.'
+NOT_APPROVED = 'You are not approved to attend this course. Please ensure your enrollment is approved.'
+ALREADY_MARKED = 'Attendance already marked for this session for this admission number.'
+IP_ALREADY_USED = 'This device/network has already been used to mark attendance for this session.'
+RECORDED = 'Attendance recorded successfully'
+
+
+def submit(session_key, admission_number, ip_address):
+    """Record attendance for a student and return an (HTTP status, message) pair."""
+    session, roster = roster_cache.get(session_key)
+    if session is None:
+        return 404, SESSION_NOT_FOUND
+
+    if session.get_status() == "Ended":
+        return 400, SESSION_ENDED
+
+    # Approved students always exist, so roster membership replaces the student lookup
+    if admission_number not in roster:
+        return 403, NOT_APPROVED
+
+    # The cached session may predate the lecturer ending it in another worker
+    current = ClassSession.objects.filter(pk=session.id, is_active=True).values_list('date', 'end_time').first()
+    if current is None:
+        roster_cache.invalidate_session(session_key)
+        return 404, SESSION_NOT_FOUND
+    if current != (session.date, session.end_time):
+        roster_cache.invalidate_session(session_key)
+        session.date, session.end_time = current
+        if session.get_status() == "Ended":
+            return 400, SESSION_ENDED
+
+    if ingest is not None:
+        # Buffered mode: acknowledge now, the record is written by the next batch flush
+        duplicate = ingest.accept(session.id, admission_number, ip_address)
+        if duplicate is None:
+            return 200, RECORDED
+        return 400, ALREADY_MARKED if duplicate == DUPLICATE_STUDENT else IP_ALREADY_USED
+
+    try:
+        with transaction.atomic():
+            AttendanceRecord.objects.create(
+                session=session,
+                student_id=admission_number,
+                ip_address=ip_address
+            )
+    except IntegrityError:
+        # A duplicate was rejected by a unique constraint; find out which one for the message
+        if AttendanceRecord.objects.filter(session=session, student_id=admission_number).exists():
+            return 400, ALREADY_MARKED
+        return 400, IP_ALREADY_USED
+
+    return 200, RECORDED
@@ -0,0 +1,164 @@
+"""
+Maintenance of the AttendanceSummary table for the attendance app.
+New records queue a recount of their (student, course) pair, done in batches off the request
+thread; session, enrollment and deletion changes adjust rows directly (see signals.py). A full
+rebuild is `manage.py rebuild_attendance_summaries`.
+"""
+
+from collections import Counter
+import threading
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, ExpressionWrapper, F, FloatField, Max, Value
+from django.db.models.functions import Coalesce, NullIf
+
+from core.batching import BatchWriter
+from core.models import ClassSession, Enrollment
+from .models import AttendanceRecord, AttendanceSummary
+
+# Submissions only queue a recount; a background thread recounts each batch of touched pairs in one go,
+# so marking attendance does not pay for a second write. Recounts are idempotent, so a lost batch is
+# repaired by the pair's next record or by a rebuild.
+summary_writer = BatchWriter(
+    'attendance_summaries',
+    lambda pairs: _recount_pairs(set(pairs)),
+    batch_size=getattr(settings, 'ATTENDANCE_INGEST_BATCH_SIZE', 200),
+    flush_interval_ms=getattr(settings, 'ATTENDANCE_INGEST_FLUSH_MS', 250),
+)
+
+# Sessions and students whose deletion is in progress in this thread; their records are not recounted one by one
+_deleting = threading.local()
+
+
+def _deleting_ids(kind):
+    if not hasattr(_deleting, kind):
+        setattr(_deleting, kind, set())
+    return getattr(_deleting, kind)
+
+
+def percentage(attended, held):
+    """SQL expression for attended / held as a percentage, 0 when nothing has been held."""
+    return Coalesce(
+        ExpressionWrapper(attended * Value(100.0) / NullIf(held, 0), output_field=FloatField()),
+        Value(0.0),
+    )
+
+
+def record_added(record, course_id):
+    """Queue the record's (student, course) pair for recounting in the next batch."""
+    summary_writer.put((record.student_id, course_id))
+
+
+def _recount_pairs(pairs):
+    students_by_course = {}
+    for student_id, course_id in pairs:
+        students_by_course.setdefault(course_id, set()).add(student_id)
+    for course_id, student_ids in students_by_course.items():
+        refresh(course_id, student_ids)
+
+
+def record_removed(record):
+    if record.session_id in _deleting_ids('sessions') or record.student_id in _deleting_ids('students'):
+        return
+    course_id = ClassSession.objects.filter(id=record.session_id).values_list('course_id', flat=True).first()
+    if course_id is not None:
+        refresh(course_id, [record.student_id])
+
+
+def session_added(session):
+    """A new session is one more held for everyone tracked in its course."""
+    held = F('sessions_held') + 1
+    AttendanceSummary.objects.filter(course_id=session.course_id).update(
+        sessions_held=held,
+        percentage=percentage(F('attended'), held),
+    )
+
+
+def deleting(kind, instance_id):
+    """Mark a session or student as being deleted, so its cascaded records are not recounted one by one."""
+    _deleting_ids(kind).add(instance_id)
+
+
+def deleted(kind, instance_id):
+    _deleting_ids(kind).discard(instance_id)
+
+
+def session_removed(session):
+    # Recount once the whole cascade has committed; the course itself may be on its way out too
+    course_id = session.course_id
+    transaction.on_commit(lambda: refresh(course_id))
+
+
+def records_added(records):
+    """Recount the pairs touched by a bulk insert, which sends no post_save signals."""
+    courses = dict(ClassSession.objects.filter(
+        id__in={record.session_id for record in records}
+    ).values_list('id', 'course_id'))
+    _recount_pairs({(r.student_id, courses[r.session_id]) for r in records if r.session_id in courses})
+
+
+def enrollment_added(enrollment):
+    """Track newly enrolled students so their courses show up before they attend anything."""
+    if not AttendanceSummary.objects.filter(student_id=enrollment.student_id, course_id=enrollment.course_id).exists():
+        refresh(enrollment.course_id, [enrollment.student_id])
+
+
+def enrollment_removed(enrollment):
+    # Keep the row while it still counts attendance for the course
+    AttendanceSummary.objects.filter(
+        student_id=enrollment.student_id, course_id=enrollment.course_id, attended=0,
+    ).delete()
+
+
+def refresh(course_id=None, student_ids=None):
+    """
+    Recompute the summaries of a course (optionally only some of its students), or of every
+    course when course_id is None, replacing whatever rows were there.
+    """
+    sessions = ClassSession.objects.all()
+    records = AttendanceRecord.objects.all()
+    enrollments = Enrollment.objects.all()
+    summaries = AttendanceSummary.objects.all()
+    if course_id is not None:
+        sessions = sessions.filter(course_id=course_id)
+        records = records.filter(session__course_id=course_id)
+        enrollments = enrollments.filter(course_id=course_id)
+        summaries = summaries.filter(course_id=course_id)
+    if student_ids is not None:
+        student_ids = list(student_ids)
+        records = records.filter(student_id__in=student_ids)
+        enrollments = enrollments.filter(student_id__in=student_ids)
+        summaries = summaries.filter(student_id__in=student_ids)
+
+    held = Counter(dict(sessions.order_by().values('course_id').annotate(n=Count('id')).values_list('course_id', 'n')))
+    stats = {
+        (student_id, course): (attended, last_seen)
+        for student_id, course, attended, last_seen in records.order_by()
+        .values('student_id', 'session__course_id')
+        .annotate(attended=Count('id'), last_seen=Max('timestamp'))
+        .values_list('student_id', 'session__course_id', 'attended', 'last_seen')
+    }
+    pairs = set(stats) | set(enrollments.values_list('student_id', 'course_id'))
+
+    rows = []
+    for student_id, course in pairs:
+        attended, last_seen = stats.get((student_id, course), (0, None))
+        sessions_held = held[course]
+        rows.append(AttendanceSummary(
+            student_id=student_id, course_id=course, attended=attended, sessions_held=sessions_held,
+            percentage=100.0 * attended / sessions_held if sessions_held else 0.0, last_seen=last_seen,
+        ))
+    stale = [
+        summary_id for student_id, course, summary_id in summaries.values_list('student_id', 'course_id', 'id')
+        if (student_id, course) not in pairs
+    ]
+    # Upsert rather than delete and reinsert, so a concurrent recount of the same pair cannot collide
+    with transaction.atomic():
+        for start in range(0, len(stale), 500):
+            AttendanceSummary.objects.filter(id__in=stale[start:start + 500]).delete()
+        AttendanceSummary.objects.bulk_create(
+            rows, batch_size=1000, update_conflicts=True, unique_fields=['student', 'course'],
+            update_fields=['attended', 'sessions_held', 'percentage', 'last_seen'],
+        )
+    return len(rows)
@@ -0,0 +1,242 @@
+"""
+Tests for the attendance app.
+"""
+
+from datetime import time
+import tempfile
+import time as clock
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+
+from core.models import Course, ClassSession, Enrollment
+from core.testing import ExplainTestCase
+from . import counters, ingest, submission, summaries
+from .models import Student, AttendanceRecord, AttendanceSummary
+from .roster import roster_cache
+from .utils import get_client_ip
+
+
+class AttendanceSummaryTests(TransactionTestCase):
+    """Summaries are recounted by the background writer, so these run with real commits."""
+
+    def setUp(self):
+        lecturer = User.objects.create_user(username='lecturer')
+        self.course = Course.objects.create(course_code='SUM-101', title='Summaries')
+        self.students = [
+            Student.objects.create(admission_number=f'S{i}', first_name='Student', last_name=str(i))
+            for i in range(2)
+        ]
+        for student in self.students:
+            Enrollment.objects.create(student=student, course=self.course, status='approved')
+        self.sessions = [
+            ClassSession.objects.create(
+                course=self.course, faculty=lecturer, title=f'Lecture {i}', start_time=time(8), end_time=time(10),
+            )
+            for i in range(2)
+        ]
+
+    def attended(self, student, expected, timeout=2.0):
+        """The student's attended count once it reaches expected, or its last value after timeout."""
+        deadline = clock.monotonic() + timeout
+        while True:
+            summary = AttendanceSummary.objects.filter(student=student, course=self.course).first()
+            attended = summary.attended if summary else 0
+            if attended == expected or clock.monotonic() > deadline:
+                return attended
+            clock.sleep(0.02)
+
+    def test_records_made_in_a_row_are_all_counted(self):
+        student = self.students[0]
+        AttendanceRecord.objects.create(session=self.sessions[0], student=student)
+        self.assertEqual(self.attended(student, 1), 1)
+        # A later record starts a new batch after the first has been flushed
+        AttendanceRecord.objects.create(session=self.sessions[1], student=student)
+        self.assertEqual(self.attended(student, 2), 2)
+
+    def test_records_for_different_students_are_all_counted(self):
+        for student in self.students:
+            AttendanceRecord.objects.create(session=self.sessions[0], student=student)
+        for student in self.students:
+            self.assertEqual(self.attended(student, 1), 1)
+
+    def tearDown(self):
+        summaries.summary_writer.flush()
+
+
+class IngestWriteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        lecturer = User.objects.create_user(username='lecturer')
+        course = Course.objects.create(course_code='ING-101', title='Ingest')
+        self.session = ClassSession.objects.create(
+            course=course, faculty=lecturer, title='Lecture', start_time=time(8), end_time=time(10),
+        )
+        self.students = [
+            Student.objects.create(admission_number=f'I{i}', first_name='Student', last_name=str(i))
+            for i in range(2)
+        ]
+        AttendanceRecord.objects.create(session=self.session, student=self.students[0], ip_address='10.0.0.1')
+
+    def test_marks_dropped_by_the_constraints_are_reported_and_not_counted(self):
+        self.assertEqual(counters.session_count(self.session.id), 1)
+        # As if another worker had already claimed I0 for this session
+        duplicate = AttendanceRecord(session=self.session, student=self.students[0], ip_address='10.0.0.2')
+        fresh = AttendanceRecord(session=self.session, student=self.students[1], ip_address='10.0.0.3')
+        with self.assertLogs('attendance.ingest', 'WARNING') as logs:
+            written = ingest.write_records([duplicate, fresh])
+        self.assertEqual(written, [fresh])
+        self.assertIn('I0', logs.output[0])
+        self.assertEqual(counters.session_count(self.session.id), 2)
+        self.assertEqual(AttendanceRecord.objects.filter(session=self.session).count(), 2)
+
+
+class SessionCountTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        lecturer = User.objects.create_user(username='lecturer')
+        course = Course.objects.create(course_code='CNT-101', title='Counts')
+        self.session = ClassSession.objects.create(
+            course=course, faculty=lecturer, title='Lecture', start_time=time(8), end_time=time(10),
+        )
+        self.student = Student.objects.create(admission_number='C0', first_name='Student', last_name='0')
+
+    def mark(self):
+        AttendanceRecord.objects.create(session=self.session, student=self.student)
+
+    def test_count_moves_when_the_record_commits(self):
+        self.assertEqual(counters.session_count(self.session.id), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.mark()
+        with self.assertNumQueries(0):
+            self.assertEqual(counters.session_count(self.session.id), 1)
+
+    def test_rolled_back_record_is_not_counted(self):
+        self.assertEqual(counters.session_count(self.session.id), 0)
+        with self.captureOnCommitCallbacks(execute=True):
+            with self.assertRaises(RuntimeError), transaction.atomic():
+                self.mark()
+                raise RuntimeError
+        with self.assertNumQueries(0):
+            self.assertEqual(counters.session_count(self.session.id), 0)
+
+    def test_missing_count_is_recounted(self):
+        self.mark()
+        counters.invalidate(self.session.id)
+        with self.assertNumQueries(1):
+            self.assertEqual(counters.session_count(self.session.id), 1)
+
+    def test_file_backend_counts_are_invalidated_not_incremented(self):
+        location = tempfile.TemporaryDirectory()
+        self.addCleanup(location.cleanup)
+        file_cache = {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': location.name}
+        with override_settings(CACHES={**settings.CACHES, 'counts': file_cache}, ATTENDANCE_COUNT_CACHE='counts'):
+            self.assertEqual(counters.session_count(self.session.id), 0)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.mark()
+            self.assertIsNone(caches['counts'].get(f'attendance_count:{self.session.id}'))
+            self.assertEqual(counters.session_count(self.session.id), 1)
+
+
+class RosterStalenessTests(TestCase):
+    def setUp(self):
+        lecturer = User.objects.create_user(username='lecturer')
+        self.course = Course.objects.create(course_code='RST-101', title='Rosters')
+        self.students = [
+            Student.objects.create(admission_number=f'T{i}', first_name='Student', last_name=str(i))
+            for i in range(3)
+        ]
+        for student in self.students:
+            Enrollment.objects.create(student=student, course=self.course, status='approved')
+        self.session = ClassSession.objects.create(
+            course=self.course, faculty=lecturer, title='Lecture', start_time=time(0), end_time=time(23, 59, 59),
+        )
+
+    def submit(self, i):
+        return submission.submit(self.session.session_key, f'T{i}', f'10.0.0.{i}')[0]
+
+    def test_session_ended_in_another_worker_refuses_marks(self):
+        self.assertEqual(self.submit(0), 200)
+        # update() sends no signals, like a save in another worker: this worker's roster is untouched
+        ClassSession.objects.filter(pk=self.session.pk).update(is_active=False)
+        self.assertEqual(self.submit(1), 404)
+
+    def test_end_time_moved_in_another_worker_refuses_marks(self):
+        self.assertEqual(self.submit(0), 200)
+        ClassSession.objects.filter(pk=self.session.pk).update(end_time=time(0, 0, 1))
+        self.assertEqual(self.submit(1), 400)
+
+    def test_reload_racing_an_invalidation_is_not_cached(self):
+        roster_cache.invalidate_session(self.session.session_key)
+        filter_enrollments = Enrollment.objects.filter
+
+        def approve_meanwhile(*args, **kwargs):
+            roster_cache.invalidate_course(self.course.id)
+            return filter_enrollments(*args, **kwargs)
+
+        with mock.patch.object(Enrollment.objects, 'filter', side_effect=approve_meanwhile):
+            roster_cache.reload(self.session.session_key)
+        self.assertNotIn(self.session.session_key, roster_cache._entries)
+
+
+class ClientIpTests(SimpleTestCase):
+    def ip(self, forwarded_for=None):
+        headers = {'HTTP_X_FORWARDED_FOR': forwarded_for} if forwarded_for else {}
+        return get_client_ip(RequestFactory().post('/', REMOTE_ADDR='10.0.0.9', **headers))
+
+    @override_settings(TRUSTED_PROXY_COUNT=0)
+    def test_forwarded_for_is_ignored_without_a_trusted_proxy(self):
+        self.assertEqual(self.ip('1.2.3.4'), '10.0.0.9')
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_address_appended_by_the_proxy_is_used(self):
+        # The client sent "1.2.3.4" itself; the proxy appended the address it saw
+        self.assertEqual(self.ip('1.2.3.4, 198.51.100.7'), '198.51.100.7')
+
+    @override_settings(TRUSTED_PROXY_COUNT=2)
+    def test_address_appended_by_the_outermost_proxy_is_used(self):
+        self.assertEqual(self.ip('1.2.3.4, 198.51.100.7, 10.0.0.2'), '198.51.100.7')
+
+    @override_settings(TRUSTED_PROXY_COUNT=1)
+    def test_request_that_bypassed_the_proxy_uses_the_peer_address(self):
+        self.assertEqual(self.ip(), '10.0.0.9')
+
+
+@override_settings(TRUSTED_PROXY_COUNT=1, ATTENDANCE_SUBMIT_RATE_LIMITS={'ip': (2, 60)})
+class SubmitRateLimitTests(TestCase):
+    def test_rotating_forwarded_for_does_not_evade_the_ip_limit(self):
+        url = '/attendance/submit/00000000-0000-0000-0000-0000000000a1/'
+        statuses = [
+            self.client.post(url, '{}', content_type='application/json',
+                             HTTP_X_FORWARDED_FOR=f'1.2.3.{i}, 198.51.100.24').status_code
+            for i in range(3)
+        ]
+        self.assertEqual(statuses, [400, 400, 429])
+
+
+class HotQueryTests(ExplainTestCase):
+    def test_submit_duplicate_student(self):
+        self.assertIndexed(
+            AttendanceRecord.objects.filter(session=self.session, student=self.student), 'attendance_attendancerecord',
+        )
+
+    def test_submit_duplicate_ip(self):
+        self.assertIndexed(
+            AttendanceRecord.objects.filter(session=self.session, ip_address='10.0.0.1'), 'attendance_attendancerecord',
+        )
+
+    def test_roster_approved_enrollments(self):
+        self.assertIndexed(
+            Enrollment.objects.filter(course=self.course, status='approved').values_list('student_id', flat=True),
+            'core_enrollment',
+        )
+
+    def test_student_attendance_history_per_course(self):
+        self.assertIndexed(
+            AttendanceRecord.objects.filter(student=self.student, session__course=self.course),
+            'attendance_attendancerecord',
+        )
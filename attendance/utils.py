@@ -2,3 +2,20 @@
 Utility functions for the attendance app.
 Add any helper functions here to support attendance workflows.
 """
+
+from django.conf import settings
+
+
+def get_client_ip(request):
+    """
+    Return the client IP address. X-Forwarded-For is only honoured behind TRUSTED_PROXY_COUNT proxies:
+    each appends the address it received the request from, so the entry appended by the outermost
+    trusted proxy is the last one the client cannot forge.
+    """
+    proxies = getattr(settings, 'TRUSTED_PROXY_COUNT', 0)
+    if proxies:
+        hops = [hop.strip() for hop in request.META.get('HTTP_X_FORWARDED_FOR', '').split(',') if hop.strip()]
+        if len(hops) >= proxies:
+            return hops[-proxies]
+    # No trusted proxy, or the request bypassed one: the peer address is the client
+    return request.META.get('REMOTE_ADDR')
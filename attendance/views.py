@@ -12,8 +12,11 @@ from django.views.decorators.csrf import csrf_exempt
 from django.utils import timezone
 import json
 
-from .models import Student, AttendanceRecord
+from .models import Student, AttendanceRecord, AttendanceSummary
+from .utils import get_client_ip
+from . import submission
 from core.models import ClassSession, Course, Enrollment, EnrollmentKey
+from core.ratelimit import rate_limit
 
 def mark_attendance_form(request, session_key):
     """Display form for students to mark attendance for a session."""
@@ -38,24 +41,25 @@ def mark_attendance_form(request, session_key):
     
     return render(request, 'attendance/mark_form.html', context)
 
+# Retry storms are turned away per phone and per session before any database work
+SUBMIT_RATE_KEYS = {
+    'ip': lambda request, session_key: get_client_ip(request),
+    'session': lambda request, session_key: session_key,
+}
+
+
 @csrf_exempt
 @require_POST
+@rate_limit('submit', SUBMIT_RATE_KEYS, 'ATTENDANCE_SUBMIT_RATE_LIMITS')
 def submit_attendance(request, session_key):
     """Process attendance submission for a session by a student."""
     try:
-        # Get session
-        session = get_object_or_404(ClassSession, session_key=session_key, is_active=True)
-        
-        # Check if session has ended
-        if session.get_status() == "Ended":
-            return JsonResponse({
-                'success': False,
-                'message': 'Attendance marking is not allowed. The session has already ended.'
-            }, status=400)
-        
         # Parse JSON data
-        data = json.loads(request.body)
-        admission_number = data.get('admission_number')
+        try:
+            data = json.loads(request.body)
+        except ValueError:
+            data = {}
+        admission_number = data.get('admission_number') if isinstance(data, dict) else None
         
         # Validate input
         if not admission_number:
@@ -64,52 +68,12 @@ def submit_attendance(request, session_key):
                 'message': 'Missing required information'
             }, status=400)
         
-        # Get or create student
-        student, created = Student.objects.get_or_create(
-            admission_number=admission_number,
-            defaults={'first_name': '', 'last_name': ''}
-        )
-        
-        # Check if student is enrolled in the course and approved
-        if not Enrollment.objects.filter(student=student, course=session.course, status='approved').exists():
-            return JsonResponse({
-                'success': False,
-                'message': 'You are not approved to attend this course. Please ensure your enrollment is approved.'
-            }, status=403)
-        
-        # Check for existing attendance by student for this session
-        if AttendanceRecord.objects.filter(session=session, student=student).exists():
-            return JsonResponse({
-                'success': False,
-                'message': 'Attendance already marked for this session for this admission number.'
-            }, status=400)
-        
-        # Get client IP address (handle X-Forwarded-For if behind proxy)
-        ip_address = request.META.get('HTTP_X_FORWARDED_FOR')
-        if ip_address:
-            ip_address = ip_address.split(',')[0].strip()
-        else:
-            ip_address = request.META.get('REMOTE_ADDR')
-        
-        # Check if this IP has already been used for this session
-        if AttendanceRecord.objects.filter(session=session, ip_address=ip_address).exists():
-            return JsonResponse({
-                'success': False,
-                'message': 'This device/network has already been used to mark attendance for this session.'
-            }, status=400)
-        
-        # Create attendance record
-        record = AttendanceRecord(
-            session=session,
-            student=student,
-            ip_address=ip_address
-        )
-        record.save()
-        
+        # Eligibility and duplicate checks run against the cached roster and DB constraints
+        status, message = submission.submit(session_key, str(admission_number), get_client_ip(request))
         return JsonResponse({
-            'success': True,
-            'message': 'Attendance recorded successfully'
-        })
+            'success': status == 200,
+            'message': message
+        }, status=status)
         
     except Exception as e:
         return JsonResponse({
@@ -198,6 +162,18 @@ def view_enrollments(request):
         'student': student
     })
 
+def course_attendance(student, course=None):
+    """Map each of a student's course summaries to its records, read with two queries."""
+    course_summaries = AttendanceSummary.objects.filter(student=student).select_related('course').order_by('course__course_code')
+    records = AttendanceRecord.objects.filter(student=student).select_related('session')
+    if course is not None:
+        course_summaries = course_summaries.filter(course=course)
+        records = records.filter(session__course=course)
+    records_by_course = {}
+    for record in records:
+        records_by_course.setdefault(record.session.course_id, []).append(record)
+    return {summary: records_by_course.get(summary.course_id, []) for summary in course_summaries}
+
 def student_attendance(request):
     """Allow students to view their attendance records for enrolled courses."""
     attendance_records = None
@@ -217,18 +193,8 @@ def student_attendance(request):
         try:
             student = Student.objects.get(admission_number=admission_number)
             
-            # Get all enrollments for this student
-            enrollments = Enrollment.objects.filter(student=student).select_related('course')
-            
-            # Get all attendance records for this student, organized by course
-            attendance_records = {}
-            for enrollment in enrollments:
-                course_records = AttendanceRecord.objects.filter(
-                    student=student,
-                    session__course=enrollment.course
-                ).select_related('session')
-                
-                attendance_records[enrollment.course] = course_records
+            # One precomputed summary per course, and every record in a single query
+            attendance_records = course_attendance(student)
                 
         except Student.DoesNotExist:
             # Only add the error message here, not in GET logic below
@@ -245,12 +211,7 @@ def student_attendance(request):
             filter_course = course
             
             # Only get attendance for the specified course
-            attendance_records = {
-                course: AttendanceRecord.objects.filter(
-                    student=student, 
-                    session__course=course
-                ).select_related('session')
-            }
+            attendance_records = course_attendance(student, course)
         except (Student.DoesNotExist, Course.DoesNotExist):
             # Do not add error message here to avoid duplication
             return redirect('attendance:student_attendance')
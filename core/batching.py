@@ -0,0 +1,164 @@
+"""
+Write-behind batching for the SmartCampus project.
+BatchWriter buffers items in process and hands them to a flush function every N items or M
+milliseconds, optionally spooling them to disk first so a crashed worker's backlog can be drained.
+"""
+
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from django.db import close_old_connections
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class BatchWriter:
+    """Buffer items and flush them in batches from a background thread."""
+
+    def __init__(self, name, flush_func, batch_size=200, flush_interval_ms=250, spool_dir=None, serialize=None):
+        self.name = name
+        self.flush_func = flush_func
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.spool_dir = Path(spool_dir) if spool_dir else None
+        self.serialize = serialize
+        self._items = []
+        self._oldest = None
+        self._cond = threading.Condition()
+        # Serialises writes so flush() also waits for a batch already in flight
+        self._write_lock = threading.Lock()
+        self._thread = None
+        self._spool = None
+        self._spool_seq = 0
+        self._last_flush_size = 0
+        self._last_flush_lag_ms = 0.0
+        metrics.set_gauge(f'{name}.pending', lambda: len(self._items))
+        metrics.set_gauge(f'{name}.last_flush_size', lambda: self._last_flush_size)
+        metrics.set_gauge(f'{name}.last_flush_lag_ms', lambda: self._last_flush_lag_ms)
+        atexit.register(self.flush)
+
+    def put(self, item):
+        """Queue an item; it is written by the next flush."""
+        with self._cond:
+            if self.spool_dir is not None:
+                self._spool_file().write(json.dumps(self.serialize(item)) + '\n')
+                self._spool.flush()
+            if not self._items:
+                self._oldest = time.monotonic()
+            self._items.append(item)
+            # Wake the writer when a new batch starts (so it arms the flush deadline) and when one fills up
+            if len(self._items) == 1 or len(self._items) >= self.batch_size:
+                self._cond.notify()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name=f'{self.name}-writer', daemon=True)
+                self._thread.start()
+
+    def flush(self):
+        """Write everything queued so far in the calling thread."""
+        with self._write_lock:
+            batch, spooled = self._take()
+            if batch:
+                self._write(batch, spooled)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while True:
+                    if self._items:
+                        remaining = self._oldest + self.flush_interval - time.monotonic()
+                        if len(self._items) >= self.batch_size or remaining <= 0:
+                            break
+                        self._cond.wait(remaining)
+                    else:
+                        self._cond.wait()
+            close_old_connections()
+            self.flush()
+            close_old_connections()
+
+    def _take(self):
+        """Detach the pending batch and rotate the spool file that backs it."""
+        with self._cond:
+            if not self._items:
+                return [], None
+            batch, self._items = self._items, []
+            self._last_flush_lag_ms = (time.monotonic() - self._oldest) * 1000
+            spooled = None
+            if self._spool is not None:
+                self._spool.close()
+                self._spool = None
+                self._spool_seq += 1
+                spooled = self._spool_path().with_suffix(f'.{self._spool_seq}.flushing')
+                os.replace(self._spool_path(), spooled)
+            return batch, spooled
+
+    def _write(self, batch, spooled):
+        try:
+            self.flush_func(batch)
+        except Exception:
+            # The spooled copy is kept so drain_spool() can retry it later
+            metrics.incr(f'{self.name}.flush_errors')
+            logger.exception('Failed to flush %d %s items', len(batch), self.name)
+            return
+        self._last_flush_size = len(batch)
+        metrics.incr(f'{self.name}.flushes')
+        metrics.incr(f'{self.name}.flushed', len(batch))
+        if spooled is not None:
+            spooled.unlink(missing_ok=True)
+
+    def _spool_path(self):
+        return self.spool_dir / f'{self.name}-{os.getpid()}.jsonl'
+
+    def _spool_file(self):
+        if self._spool is None:
+            self.spool_dir.mkdir(parents=True, exist_ok=True)
+            self._spool = open(self._spool_path(), 'a', encoding='utf-8')
+        return self._spool
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def drain_spool(name, spool_dir, deserialize, flush_func, batch_size=1000):
+    """Write out spool files left behind by stopped workers; returns the number of items drained."""
+    spool_dir = Path(spool_dir)
+    if not spool_dir.exists():
+        return 0
+    drained = 0
+    for path in sorted(spool_dir.glob(f'{name}-*')):
+        pid = path.name[len(name) + 1:].split('.')[0]
+        # Never touch the live spool of a running worker
+        if pid.isdigit() and int(pid) != os.getpid() and _pid_alive(int(pid)):
+            continue
+        batch = []
+        with open(path, encoding='utf-8') as spool:
+            for line in spool:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    # A worker killed mid-write can leave a truncated last line
+                    logger.warning('Skipping malformed line in %s', path)
+                    continue
+                batch.append(deserialize(item))
+                if len(batch) >= batch_size:
+                    flush_func(batch)
+                    drained += len(batch)
+                    batch = []
+        if batch:
+            flush_func(batch)
+            drained += len(batch)
+        path.unlink()
+    return drained
@@ -0,0 +1,74 @@
+"""
+Helpers shared by the benchmark management commands.
+Builds throwaway fixtures in the configured database and summarises latency samples.
+"""
+
+from contextlib import contextmanager
+from datetime import time
+import math
+import uuid
+
+from django.contrib.auth.models import User
+from django.utils import timezone
+
+
+def percentile(samples, pct):
+    """Return the pct-th percentile of a list of samples (nearest-rank)."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(pct / 100.0 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples):
+    """Summarise latency samples (seconds) as milliseconds."""
+    return {
+        'count': len(samples),
+        'p50_ms': percentile(samples, 50) * 1000,
+        'p99_ms': percentile(samples, 99) * 1000,
+        'max_ms': max(samples) * 1000 if samples else 0.0,
+        'mean_ms': sum(samples) / len(samples) * 1000 if samples else 0.0,
+    }
+
+
+@contextmanager
+def synthetic_session(student_count, approved=True):
+    """Create a course, an all-day active session and an enrolled cohort; remove them afterwards."""
+    from attendance import summaries
+    from attendance.models import Student
+    from core.models import Course, ClassSession, Enrollment
+
+    tag = uuid.uuid4().hex[:8]
+    faculty = User.objects.create_user(username=f'bench-{tag}', password=None)
+    course = Course.objects.create(course_code=f'BENCH-{tag}', title='Benchmark course')
+    course.lecturers.add(faculty)
+    admission_numbers = [f'B{tag}{i:07d}' for i in range(student_count)]
+    try:
+        Student.objects.bulk_create(
+            [Student(admission_number=n, first_name='Bench', last_name=str(i)) for i, n in enumerate(admission_numbers)],
+            batch_size=1000,
+        )
+        Enrollment.objects.bulk_create(
+            [Enrollment(student_id=n, course=course, status='approved' if approved else 'pending') for n in admission_numbers],
+            batch_size=1000,
+        )
+        # bulk_create sends no signals, so track the cohort's summaries as enrolling one by one would
+        summaries.refresh(course.id)
+        # Created last so the roster it preloads already contains the cohort
+        session = ClassSession.objects.create(
+            course=course,
+            faculty=faculty,
+            title='Benchmark session',
+            date=timezone.localdate(),
+            start_time=time(0, 0),
+            end_time=time(23, 59, 59),
+        )
+        yield session, admission_numbers
+    finally:
+        # Recounts still queued for the cohort would otherwise race the cleanup
+        summaries.summary_writer.flush()
+        # Deleting the course cascades to its sessions, enrollments and attendance records
+        course.delete()
+        Student.objects.filter(admission_number__startswith=f'B{tag}').delete()
+        faculty.delete()
@@ -0,0 +1,16 @@
+"""
+Database connection setup for the SmartCampus project.
+Applies the SQLITE_PRAGMAS from settings to every new SQLite connection; other backends are untouched.
+"""
+
+from django.conf import settings
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """connection_created handler: run PRAGMA name = value for each configured pragma."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
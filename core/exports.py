@@ -0,0 +1,36 @@
+"""
+Streaming CSV exports for the SmartCampus project.
+Rows are encoded as they are pulled from the database and sent in small chunks, so an export
+holds one chunk in memory regardless of table size and its first byte goes out immediately.
+"""
+
+import csv
+import io
+
+from django.http import StreamingHttpResponse
+
+EXPORT_CHUNK_SIZE = 2000  # Rows fetched per database round trip
+EXPORT_FLUSH_BYTES = 64 * 1024  # Encoded bytes buffered before a chunk is sent
+
+
+def iter_csv(rows, flush_bytes=EXPORT_FLUSH_BYTES):
+    """Encode an iterable of rows as CSV text, yielding the first row at once and then ~flush_bytes chunks."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    first = True
+    for row in rows:
+        writer.writerow(row)
+        if first or buffer.tell() >= flush_bytes:
+            first = False
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def csv_response(rows, filename):
+    """A StreamingHttpResponse that downloads rows (any iterable, ideally lazy) as filename."""
+    response = StreamingHttpResponse(iter_csv(rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
@@ -0,0 +1,45 @@
+"""
+Query filters shared by the SmartCampus list views.
+Calendar-date filters on datetime columns become half-open ranges of aware datetimes in the
+project time zone, so they compare the raw column and can seek on its index.
+"""
+
+from datetime import date, datetime, time, timedelta
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+
+def _parse(value):
+    if isinstance(value, date):
+        return value
+    try:
+        return parse_date(value) if value else None
+    except ValueError:
+        return None
+
+
+def day_start(day):
+    """The aware datetime at which local calendar day `day` begins."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def date_range(start, end):
+    """
+    Turn ?date_start= / ?date_end= values (YYYY-MM-DD or dates, inclusive) into (since, until) with since <= t < until.
+    Either bound is None when its value is missing or not a valid date.
+    """
+    start, end = _parse(start), _parse(end)
+    since = day_start(start) if start else None
+    until = day_start(end + timedelta(days=1)) if end else None
+    return since, until
+
+
+def filter_date_range(queryset, field, start, end):
+    """Restrict queryset to rows whose datetime `field` falls on the local dates start..end inclusive."""
+    since, until = date_range(start, end)
+    if since is not None:
+        queryset = queryset.filter(**{f'{field}__gte': since})
+    if until is not None:
+        queryset = queryset.filter(**{f'{field}__lt': until})
+    return queryset
@@ -0,0 +1,81 @@
+"""
+Management command that compares attendance submission throughput across database profiles.
+Each profile is a DATABASE_URL: the command migrates it in a fresh process and replays the same
+burst of submissions with bench_submit_attendance, then prints the results side by side.
+"""
+
+import json
+import os
+from pathlib import Path
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Replay a burst of attendance submissions against SQLite (WAL) and Postgres and compare throughput.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=400, help='Submissions per burst (one per student)')
+        parser.add_argument('--concurrency', type=int, nargs='+', default=[8, 32], help='Client threads per burst')
+        parser.add_argument('--postgres-url', default=os.environ.get('BENCH_POSTGRES_URL'),
+                            help='A scratch Postgres database, e.g. postgres://postgres@localhost:5432/geoattend_bench '
+                                 '(default: $BENCH_POSTGRES_URL; skipped when unset)')
+        parser.add_argument('--profile', action='append', default=[], metavar='NAME=URL',
+                            help='Extra DATABASE_URL to compare, e.g. pgbouncer=postgres://...:6432/db')
+        parser.add_argument('--json', action='store_true', help='Print the results as a single JSON object')
+
+    def handle(self, *args, **options):
+        with tempfile.TemporaryDirectory() as scratch:
+            sqlite_path = Path(scratch) / 'bench.sqlite3'
+            profiles = [('sqlite-wal', f'sqlite:///{sqlite_path}')]
+            if options['postgres_url']:
+                profiles.append(('postgres', options['postgres_url']))
+            else:
+                self.stderr.write('No --postgres-url or BENCH_POSTGRES_URL given; benchmarking SQLite only.')
+            for profile in options['profile']:
+                name, sep, url = profile.partition('=')
+                if not sep:
+                    raise CommandError(f'--profile expects NAME=URL, got {profile!r}')
+                profiles.append((name, url))
+
+            results = []
+            for name, url in profiles:
+                env = dict(os.environ, DATABASE_URL=url)
+                self._manage(env, 'migrate', '--noinput', '-v', '0')
+                if url.startswith('sqlite:'):
+                    # journal_mode is stored in the database file, so every later connection gets WAL
+                    sqlite3.connect(sqlite_path).execute('PRAGMA journal_mode=WAL').close()
+                for concurrency in options['concurrency']:
+                    output = self._manage(
+                        env, 'bench_submit_attendance', '--json',
+                        '--requests', str(options['requests']), '--concurrency', str(concurrency),
+                    )
+                    result = json.loads(output.strip().splitlines()[-1])
+                    result['profile'] = name
+                    results.append(result)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results))
+            return
+        self.stdout.write(f'{"profile":<14}{"threads":>8}{"req/s":>10}{"p50 ms":>10}{"p99 ms":>10}{"errors":>8}')
+        for r in results:
+            errors = sum(count for status, count in r['statuses'].items() if int(status) >= 500)
+            self.stdout.write(
+                f'{r["profile"]:<14}{r["concurrency"]:>8}{r["throughput_rps"]:>10.0f}'
+                f'{r["p50_ms"]:>10.1f}{r["p99_ms"]:>10.1f}{errors:>8}'
+            )
+
+    def _manage(self, env, *args):
+        """Run a manage.py command in a fresh process, so it connects with env's DATABASE_URL."""
+        completed = subprocess.run(
+            [sys.executable, str(Path(settings.BASE_DIR) / 'manage.py'), *args],
+            env=env, capture_output=True, text=True,
+        )
+        if completed.returncode:
+            raise CommandError(f'manage.py {args[0]} failed against {env["DATABASE_URL"]}:\n{completed.stderr}')
+        return completed.stdout
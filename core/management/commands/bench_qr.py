@@ -0,0 +1,36 @@
+"""
+Management command to benchmark the QR code renderers.
+Compares render time and payload size of each backend at the ERROR_CORRECT_M level used for sessions.
+"""
+
+import time
+import uuid
+
+from django.core.management.base import BaseCommand
+
+from core.benchmarks import summarize
+from core.qr import RENDERERS
+
+
+class Command(BaseCommand):
+    help = 'Compare render time and payload size of the png, svg and matrix QR renderers.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=200, help='Renders per backend')
+        parser.add_argument('--url', default=None, help='Data to encode (defaults to a typical attendance URL)')
+
+    def handle(self, *args, **options):
+        url = options['url'] or f'http://192.168.1.147:8000/attendance/mark/{uuid.uuid4()}/'
+        self.stdout.write(f'Encoding {len(url)} characters, {options["iterations"]} renders per backend\n')
+        self.stdout.write(f'{"renderer":<10}{"mean ms":>10}{"p50 ms":>10}{"p99 ms":>10}{"bytes":>10}')
+
+        for name, (render, _) in RENDERERS.items():
+            samples = []
+            for _ in range(options['iterations']):
+                start = time.perf_counter()
+                payload = render(url)
+                samples.append(time.perf_counter() - start)
+            stats = summarize(samples)
+            self.stdout.write(
+                f'{name:<10}{stats["mean_ms"]:>10.2f}{stats["p50_ms"]:>10.2f}{stats["p99_ms"]:>10.2f}{len(payload):>10}'
+            )
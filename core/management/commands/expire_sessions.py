@@ -0,0 +1,25 @@
+"""
+Management command to deactivate sessions that have ended.
+Runs one set-based UPDATE; schedule it from cron, or pass --every to keep it running.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.models import ClassSession
+
+
+class Command(BaseCommand):
+    help = 'Deactivate every active session whose end time has passed, in a single UPDATE.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--every', type=int, default=0, help='Repeat every N seconds instead of running once')
+
+    def handle(self, *args, **options):
+        while True:
+            expired = ClassSession.objects.expire_ended()
+            self.stdout.write(f'Deactivated {expired} ended sessions.')
+            if not options['every']:
+                break
+            time.sleep(options['every'])
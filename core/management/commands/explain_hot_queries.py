@@ -0,0 +1,31 @@
+"""
+Management command that EXPLAINs the hot queries of the attendance, faculty and administration views.
+Runs each app's HotQueryTests (see core/testing.py) against the configured database instead of a
+test database: the synthetic dataset is built inside a transaction that is rolled back, and the
+command fails if any query falls back to a full scan of the table it reads.
+"""
+
+import io
+import unittest
+
+from django.core.management.base import BaseCommand, CommandError
+
+from core.testing import ExplainTestCase, HOT_QUERY_TESTS
+
+
+class Command(BaseCommand):
+    help = 'EXPLAIN each hot query against a synthetic dataset and fail on any full table scan.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=ExplainTestCase.rows, help='Attendance records in the synthetic dataset')
+
+    def handle(self, *args, **options):
+        ExplainTestCase.rows = options['rows']
+        suite = unittest.defaultTestLoader.loadTestsFromNames(HOT_QUERY_TESTS)
+        output = io.StringIO()
+        result = unittest.TextTestRunner(stream=output, verbosity=options['verbosity'] + 1).run(suite)
+        self.stdout.write(output.getvalue())
+        if not result.wasSuccessful():
+            failures = len(result.failures) + len(result.errors)
+            raise CommandError(f'{failures} hot queries fall back to a full scan or could not be checked')
+        self.stdout.write(self.style.SUCCESS('Every hot query is served by an index.'))
@@ -0,0 +1,33 @@
+"""
+In-process metrics registry for the SmartCampus project.
+Counters and gauges live in each worker process and are exposed through the admin metrics endpoint.
+"""
+
+import threading
+
+_lock = threading.Lock()
+_counters = {}
+_gauges = {}
+
+
+def incr(name, amount=1):
+    """Increment a named counter."""
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def set_gauge(name, value):
+    """Set a gauge to a value, or to a zero-argument callable evaluated at snapshot time."""
+    with _lock:
+        _gauges[name] = value
+
+
+def snapshot():
+    """Return the current counters and gauges as a plain dict."""
+    with _lock:
+        counters = dict(_counters)
+        gauges = dict(_gauges)
+    return {
+        'counters': counters,
+        'gauges': {name: value() if callable(value) else value for name, value in gauges.items()},
+    }
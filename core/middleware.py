@@ -1,3 +1,22 @@
+from functools import wraps
+
+from django.conf import settings
+from django.contrib.auth import middleware as auth_middleware
+from django.contrib.messages import middleware as message_middleware
+from django.contrib.sessions import middleware as session_middleware
+from django.middleware import csrf as csrf_middleware
+
+
+def allow_client_caching(view_func):
+    """Mark a view's responses as safe for the browser to cache and revalidate (e.g. via ETag)."""
+    @wraps(view_func)
+    def wrapped_view(request, *args, **kwargs):
+        response = view_func(request, *args, **kwargs)
+        response.allow_client_caching = True
+        return response
+    return wrapped_view
+
+
 class DisableClientSideCachingMiddleware:
     """Middleware to prevent caching of sensitive pages."""
     def __init__(self, get_response):
@@ -5,8 +24,50 @@ class DisableClientSideCachingMiddleware:
 
     def __call__(self, request):
         response = self.get_response(request)
+        # Views decorated with allow_client_caching manage their own cache headers
+        if getattr(response, 'allow_client_caching', False):
+            return response
         # Prevent browser caching
         response['Cache-Control'] = 'no-cache, no-store, must-revalidate'
         response['Pragma'] = 'no-cache'
         response['Expires'] = '0'
-        return response
\ No newline at end of file
+        return response
+
+
+class SkipLightweightPathsMixin:
+    """
+    Pass requests under LIGHTWEIGHT_PATHS straight through the middleware this is mixed into. The
+    public attendance pages use it to skip the session, auth, messages and CSRF middleware (and the
+    session write) that anonymous students never need; everything else in MIDDLEWARE still runs.
+    """
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.lightweight_paths = tuple(getattr(settings, 'LIGHTWEIGHT_PATHS', ()))
+
+    def is_lightweight(self, request):
+        return bool(self.lightweight_paths) and request.path_info.startswith(self.lightweight_paths)
+
+    def __call__(self, request):
+        if self.is_lightweight(request):
+            return self.get_response(request)
+        return super().__call__(request)
+
+
+class SessionMiddleware(SkipLightweightPathsMixin, session_middleware.SessionMiddleware):
+    pass
+
+
+class CsrfViewMiddleware(SkipLightweightPathsMixin, csrf_middleware.CsrfViewMiddleware):
+    def process_view(self, request, callback, callback_args, callback_kwargs):
+        # The handler calls process_view itself, so skipping __call__ alone would still check the token
+        if self.is_lightweight(request):
+            return None
+        return super().process_view(request, callback, callback_args, callback_kwargs)
+
+
+class AuthenticationMiddleware(SkipLightweightPathsMixin, auth_middleware.AuthenticationMiddleware):
+    pass
+
+
+class MessageMiddleware(SkipLightweightPathsMixin, message_middleware.MessageMiddleware):
+    pass
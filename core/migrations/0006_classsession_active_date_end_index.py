@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0005_enrollment_status_enrollmentkey_expires_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='classsession',
+            index=models.Index(fields=['is_active', 'date', 'end_time'], name='session_active_date_end_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 4.2.30 on 2026-10-18 01:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0007_hot_path_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='classsession',
+            index=models.Index(fields=['date', 'start_time', 'id'], name='session_date_start_idx'),
+        ),
+    ]
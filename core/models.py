@@ -7,8 +7,6 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 import uuid
-import qrcode
-from io import BytesIO
 import base64
 
 SEMESTER_CHOICES = [
@@ -17,6 +15,15 @@ SEMESTER_CHOICES = [
     ("Sep-Dec", "September - December"),
 ]
 
+class CourseQuerySet(models.QuerySet):
+    def with_session_counts(self):
+        """Annotate session_count and faculty_count in the same query."""
+        return self.annotate(
+            session_count=models.Count('sessions', distinct=True),
+            faculty_count=models.Count('faculty_assignments', distinct=True),
+        )
+
+
 class Course(models.Model):
     """Model representing an academic course."""
     course_code = models.CharField(max_length=20, unique=True)
@@ -26,10 +33,30 @@ class Course(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = CourseQuerySet.as_manager()
+
     def __str__(self):
         return f"{self.course_code}: {self.title}"
 
 
+class ClassSessionQuerySet(models.QuerySet):
+    def with_attendance_counts(self):
+        """Annotate attendance_count in the same query instead of one COUNT per session."""
+        return self.annotate(attendance_count=models.Count('attendance_records'))
+
+    def ended(self, now=None):
+        """Active sessions whose (date, end_time) is already past in local time."""
+        now = timezone.localtime(now or timezone.now())
+        # The date bound lets the OR be answered by an index range instead of a walk of the whole index
+        return self.filter(is_active=True, date__lte=now.date()).filter(
+            models.Q(date__lt=now.date()) | models.Q(date=now.date(), end_time__lt=now.time())
+        )
+
+    def expire_ended(self, now=None):
+        """Deactivate every ended session with a single UPDATE; returns the number deactivated."""
+        return self.ended(now).update(is_active=False)
+
+
 class ClassSession(models.Model):
     """Model representing a specific class meeting."""
     course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="sessions")
@@ -44,57 +71,45 @@ class ClassSession(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = ClassSessionQuerySet.as_manager()
+
     class Meta:
         ordering = ["-date", "-start_time"]
+        indexes = [
+            # Serves the set-based expiry UPDATE
+            models.Index(fields=["is_active", "date", "end_time"], name="session_active_date_end_idx"),
+            # Faculty dashboards and session lists filter by lecturer and date
+            models.Index(fields=["faculty", "date"], name="session_faculty_date_idx"),
+            # The admin session list seeks on (date, start_time, id)
+            models.Index(fields=["date", "start_time", "id"], name="session_date_start_idx"),
+        ]
 
     def __str__(self):
         return f"{self.course} - {self.title} ({self.date})"
 
-    def get_qr_code(self, request=None):
-        """Generate a QR code for this session with extra session info."""
-        import json
-        
+    def get_attendance_url(self, request=None):
+        """Return the absolute URL students open to mark attendance for this session."""
         # Make sure we have a request object for proper URL generation
         if request is None:
             # Fallback to settings.BASE_URL only if no request is provided
-            # This should rarely happen with our improved implementation
             from django.conf import settings
-            base_url = settings.BASE_URL
-            attendance_url = f"{base_url}/attendance/mark/{self.session_key}/"
-        else:
-            # Generate a fully qualified URL including the correct host/domain
-            # This is critical for QR codes to work across devices on the same network
-            attendance_url = request.build_absolute_uri(f"/attendance/mark/{self.session_key}/")
-        
-        # Prepare session info with detailed data for better debugging
-        session_info = {
-            'session_key': str(self.session_key),
-            'course_code': self.course.course_code,
-            'course_title': self.course.title,
-            'date': self.date.strftime('%Y-%m-%d'),
-            'start_time': self.start_time.strftime('%H:%M'),
-            'url': attendance_url
-        }
-        
-        # Use a more concise data format for the QR code
-        # Instead of full JSON, just use the URL directly for better compatibility
-        qr_data = attendance_url
-        
-        # Generate QR code with error correction for better scanning
-        qr = qrcode.QRCode(
-            version=1,
-            error_correction=qrcode.constants.ERROR_CORRECT_M,  # Medium error correction
-            box_size=10,
-            border=4,
-        )
-        qr.add_data(qr_data)
-        qr.make(fit=True)
-        img = qr.make_image(fill_color="black", back_color="white")
-        
-        # Convert to base64 for embedding in web page
-        buffered = BytesIO()
-        img.save(buffered, format="PNG")
-        return base64.b64encode(buffered.getvalue()).decode()
+            return f"{settings.BASE_URL}/attendance/mark/{self.session_key}/"
+        # Generate a fully qualified URL including the correct host/domain
+        # This is critical for QR codes to work across devices on the same network
+        return request.build_absolute_uri(f"/attendance/mark/{self.session_key}/")
+
+    def get_qr_image(self, request=None, renderer=None):
+        """Return this session's QR code as a QRImage (content, ETag, content type), rendered once and cached.
+
+        renderer is 'png', 'svg' or 'matrix'; it defaults to settings.QR_CODE_RENDERER.
+        """
+        from .qr import qr_cache
+        # Just the URL is encoded, for better scanner compatibility
+        return qr_cache.get(self.session_key, self.get_attendance_url(request), renderer)
+
+    def get_qr_code(self, request=None, renderer=None):
+        """Return this session's QR code base64-encoded for embedding in a page as a data URI."""
+        return base64.b64encode(self.get_qr_image(request, renderer).content).decode()
 
     def get_status(self):
         """Return session status: Inactive, Active, or Ended based on current time."""
@@ -140,6 +155,10 @@ class Enrollment(models.Model):
 
     class Meta:
         unique_together = ('student', 'course')
+        indexes = [
+            # Roster loads fetch a course's approved students
+            models.Index(fields=["course", "status"], name="enrollment_course_status_idx"),
+        ]
 
     def __str__(self):
         return f"{self.student} enrolled in {self.course.course_code}"
@@ -0,0 +1,185 @@
+"""
+Pagination helpers for the SmartCampus project.
+Pages are cut with LIMIT and no COUNT(*): one extra row is fetched to learn whether a next page
+exists. paginate() numbers pages with OFFSET; keyset_paginate() seeks from a cursor holding the
+last row's sort key, so page N costs the same as page 1.
+"""
+
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+DEFAULT_PAGE_SIZE = 25
+
+
+class Page:
+    """One page of results with just enough state to render newer/older links."""
+
+    def __init__(self, object_list, number, has_next):
+        self.object_list = object_list
+        self.number = number
+        self._has_next = has_next
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self.number > 1
+
+    def next_page_number(self):
+        return self.number + 1
+
+    def previous_page_number(self):
+        return self.number - 1
+
+
+def page_number(value):
+    """Parse a ?page= value, falling back to the first page."""
+    try:
+        return max(1, int(value))
+    except (TypeError, ValueError):
+        return 1
+
+
+def paginate(queryset, number, per_page=DEFAULT_PAGE_SIZE):
+    """Return page `number` of an ordered queryset without counting it."""
+    number = page_number(number)
+    offset = (number - 1) * per_page
+    rows = list(queryset[offset:offset + per_page + 1])
+    return Page(rows[:per_page], number, len(rows) > per_page)
+
+
+class KeysetPage:
+    """A page cut at a cursor: each link carries the sort key of the row it continues from."""
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+
+def encode_cursor(values):
+    """URL-safe token for a row's sort key."""
+    raw = json.dumps([value.isoformat() if hasattr(value, 'isoformat') else value for value in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, model, ordering):
+    """Sort key values from a cursor token, converted back to field types; None if it is not valid."""
+    try:
+        raw = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        if len(raw) != len(ordering):
+            return None
+        return [
+            model._meta.get_field(name.lstrip('-')).to_python(value)
+            for name, value in zip(ordering, raw)
+        ]
+    except (ValueError, TypeError, ValidationError):
+        return None
+
+
+def _seek(ordering, values, forward):
+    """
+    Q for rows strictly past `values` in `ordering` (or before them when not forward).
+
+    The lexicographic OR chain is ANDed with a plain range test on the leading field, which lets
+    the database seek into an index on the sort key instead of walking it from the start.
+    """
+    conditions = Q()
+    equal = Q()
+    for name, value in zip(ordering, values):
+        field = name.lstrip('-')
+        descending = name.startswith('-')
+        lookup = 'lt' if descending == forward else 'gt'
+        conditions |= equal & Q(**{f'{field}__{lookup}': value})
+        equal &= Q(**{field: value})
+    leading = ordering[0].lstrip('-')
+    leading_lookup = 'lte' if ordering[0].startswith('-') == forward else 'gte'
+    return Q(**{f'{leading}__{leading_lookup}': values[0]}) & conditions
+
+
+def _reverse(ordering):
+    return [name[1:] if name.startswith('-') else f'-{name}' for name in ordering]
+
+
+def seek(queryset, ordering, values=None, forward=True):
+    """queryset ordered by ordering, starting just past the sort key values (from the top when None)."""
+    if values is not None:
+        queryset = queryset.filter(_seek(ordering, values, forward))
+    return queryset.order_by(*(ordering if forward else _reverse(ordering)))
+
+
+def keyset_paginate(queryset, ordering, after=None, before=None, per_page=DEFAULT_PAGE_SIZE):
+    """
+    Return the page of queryset, sorted by ordering (which must end in a unique field), that
+    follows the `after` cursor or precedes the `before` cursor; the first page when neither is set.
+    Every page costs one indexed seek plus per_page + 1 rows, however deep it is.
+    """
+    ordering = list(ordering)
+
+    def fetch(cursor, forward, limit):
+        return list(seek(queryset, ordering, cursor, forward)[:limit])
+
+    return keyset_page(fetch, queryset.model, ordering, after, before, per_page)
+
+
+def keyset_page(fetch, model, ordering, after=None, before=None, per_page=DEFAULT_PAGE_SIZE):
+    """
+    keyset_paginate() over any row source: fetch(cursor, forward, limit) returns up to limit rows
+    strictly past the cursor (from the top when None) in ordering, or in reverse when not forward.
+    """
+    ordering = list(ordering)
+    cursor = decode_cursor(before, model, ordering) if before else None
+    forward = cursor is None
+    if forward and after:
+        cursor = decode_cursor(after, model, ordering)
+
+    rows = fetch(cursor, forward, per_page + 1)
+    more = len(rows) > per_page
+    rows = rows[:per_page]
+    if not forward:
+        rows.reverse()
+
+    def key(row):
+        return encode_cursor([getattr(row, name.lstrip('-')) for name in ordering])
+
+    if not rows:
+        return KeysetPage(rows, None, None)
+    if forward:
+        has_next, has_previous = more, cursor is not None
+    else:
+        # Paging back from a cursor means the rows after this page exist
+        has_next, has_previous = True, more
+    return KeysetPage(
+        rows,
+        key(rows[-1]) if has_next else None,
+        key(rows[0]) if has_previous else None,
+    )
+
+
+def filter_query(request):
+    """The request's query string minus its paging parameters, for building page links."""
+    query = request.GET.copy()
+    for name in ('page', 'after', 'before'):
+        query.pop(name, None)
+    return query.urlencode()
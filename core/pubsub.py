@@ -0,0 +1,69 @@
+"""
+In-process publish/subscribe hub for the SmartCampus project.
+Publishers signal that a channel changed; subscribers wake up and fetch what is new themselves,
+so bursts of publishes coalesce into a single wake-up per subscriber.
+"""
+
+import threading
+from collections import defaultdict
+
+from . import metrics
+
+
+class Subscription:
+    """A subscriber's wake-up flag for one channel."""
+
+    def __init__(self, channel):
+        self.channel = channel
+        self._event = threading.Event()
+
+    def notify(self):
+        self._event.set()
+
+    def wait(self, timeout=None):
+        """Block until the channel is published to or timeout passes; returns True if woken."""
+        woken = self._event.wait(timeout)
+        self._event.clear()
+        return woken
+
+
+class Hub:
+    """Channel name -> set of subscriptions, shared by all threads of a worker process."""
+
+    def __init__(self):
+        self._channels = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        subscription = Subscription(channel)
+        with self._lock:
+            self._channels[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._channels.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._channels[subscription.channel]
+
+    def publish(self, channel):
+        with self._lock:
+            subscribers = list(self._channels.get(channel, ()))
+        for subscription in subscribers:
+            subscription.notify()
+        metrics.incr('pubsub.published')
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(subscribers) for subscribers in self._channels.values())
+
+
+hub = Hub()
+metrics.set_gauge('pubsub.subscribers', hub.subscriber_count)
+
+
+def session_channel(session_id):
+    """Channel that is published to whenever attendance is recorded for a session."""
+    return f'session:{session_id}'
@@ -0,0 +1,133 @@
+"""
+QR code rendering and caching for the core app.
+Attendance QR images are rendered once per (session_key, URL, renderer) and kept in a bounded
+LRU. Renderers produce PNG (through Pillow), SVG (a single path, the default) or the raw module matrix.
+"""
+
+from collections import OrderedDict, namedtuple
+from io import BytesIO
+import hashlib
+import threading
+
+import qrcode
+from django.conf import settings
+
+from . import metrics
+
+QR_CODE_CACHE_SIZE = getattr(settings, 'QR_CODE_CACHE_SIZE', 256)
+QR_CODE_RENDERER = getattr(settings, 'QR_CODE_RENDERER', 'svg')
+
+BOX_SIZE = 10
+BORDER = 4
+
+
+def _make_qr(data):
+    qr = qrcode.QRCode(
+        version=1,
+        error_correction=qrcode.constants.ERROR_CORRECT_M,  # Medium error correction
+        box_size=BOX_SIZE,
+        border=BORDER,
+    )
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr
+
+
+def render_png(data):
+    """Render data as a PNG QR code through Pillow."""
+    img = _make_qr(data).make_image(fill_color="black", back_color="white")
+    buffered = BytesIO()
+    img.save(buffered, format="PNG")
+    return buffered.getvalue()
+
+
+def render_svg(data):
+    """Render data as an SVG QR code drawn with a single stroked path, one segment per run of dark modules."""
+    matrix = _make_qr(data).get_matrix()
+    size = len(matrix)
+    parts = []
+    for y, row in enumerate(matrix):
+        x = 0
+        while x < size:
+            if row[x]:
+                start = x
+                while x < size and row[x]:
+                    x += 1
+                parts.append(f'M{start} {y}.5h{x - start}')
+            else:
+                x += 1
+    pixels = size * BOX_SIZE
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{pixels}" height="{pixels}" '
+        f'viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+        f'<rect width="{size}" height="{size}" fill="#fff"/>'
+        f'<path d="{"".join(parts)}" stroke="#000"/></svg>'
+    ).encode()
+
+
+def render_matrix(data):
+    """Return the raw module matrix (border included) as JSON rows of 0/1 for client-side drawing."""
+    matrix = _make_qr(data).get_matrix()
+    rows = ['"%s"' % ''.join('1' if cell else '0' for cell in row) for row in matrix]
+    return ('{"size": %d, "rows": [%s]}' % (len(matrix), ', '.join(rows))).encode()
+
+
+# Renderer name -> (render function, content type)
+RENDERERS = {
+    'png': (render_png, 'image/png'),
+    'svg': (render_svg, 'image/svg+xml'),
+    'matrix': (render_matrix, 'application/json'),
+}
+
+QRImage = namedtuple('QRImage', ['content', 'etag', 'content_type'])
+
+
+def get_renderer(name=None):
+    """Return a valid renderer name, falling back to QR_CODE_RENDERER."""
+    name = name or QR_CODE_RENDERER
+    if name not in RENDERERS:
+        raise ValueError(f'Unknown QR renderer {name!r}; expected one of {", ".join(RENDERERS)}')
+    return name
+
+
+def qr_etag(session_key, url, renderer=None):
+    """ETag for a session's QR image; the image is fully determined by its key, URL and renderer."""
+    renderer = get_renderer(renderer)
+    return '"%s"' % hashlib.sha1(f'{session_key}|{url}|{renderer}'.encode()).hexdigest()
+
+
+class QRCodeCache:
+    """Bounded LRU of rendered QR images keyed by (session_key, URL, renderer)."""
+
+    def __init__(self, maxsize=QR_CODE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._images = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_key, url, renderer=None):
+        """Return a QRImage, rendering it only on a cache miss."""
+        renderer = get_renderer(renderer)
+        key = (session_key, url, renderer)
+        with self._lock:
+            image = self._images.get(key)
+            if image is not None:
+                self._images.move_to_end(key)
+                metrics.incr('qr_cache.hits')
+                return image
+
+        metrics.incr('qr_cache.misses')
+        render, content_type = RENDERERS[renderer]
+        image = QRImage(render(url), qr_etag(session_key, url, renderer), content_type)
+        with self._lock:
+            self._images[key] = image
+            self._images.move_to_end(key)
+            while len(self._images) > self.maxsize:
+                self._images.popitem(last=False)
+        return image
+
+    def __len__(self):
+        return len(self._images)
+
+
+qr_cache = QRCodeCache()
+metrics.set_gauge('qr_cache.images', lambda: len(qr_cache))
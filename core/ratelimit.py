@@ -0,0 +1,117 @@
+"""
+Request rate limiting for the SmartCampus project.
+The rate_limit decorator answers a request with a 429 and a Retry-After header once any of its keys
+(e.g. client IP, session) is over budget, before the view does any work. Budgets are token buckets
+held in each worker process, or with RATE_LIMIT_BACKEND = 'cache' sliding windows in a shared cache.
+"""
+
+from collections import OrderedDict
+from functools import wraps
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import JsonResponse
+
+from . import metrics
+
+
+class LocalLimiter:
+    """Token buckets in this process: each key holds up to `rate` tokens, refilled at rate/per per second."""
+
+    def __init__(self, max_keys=10000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key, rate, per):
+        """Take a token for key; returns 0 when admitted, else the seconds until one is available."""
+        now = time.monotonic()
+        refill = rate / per
+        with self._lock:
+            tokens, last = self._buckets.pop(key, (rate, now))
+            tokens = min(rate, tokens + (now - last) * refill)
+            if tokens >= 1:
+                tokens -= 1
+                retry_after = 0
+            else:
+                retry_after = (1 - tokens) / refill
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                # The least recently seen key has most likely refilled anyway
+                self._buckets.popitem(last=False)
+        return retry_after
+
+
+class CacheLimiter:
+    """
+    Sliding windows in a shared cache, so every worker draws on one budget: the previous fixed
+    window's count, weighted by how much of it still overlaps the sliding one, plus the current count.
+    """
+
+    def __init__(self, alias='default'):
+        self.alias = alias
+
+    def hit(self, key, rate, per):
+        cache = caches[self.alias]
+        now = time.time()
+        window = int(now // per)
+        elapsed = now / per - window
+        current_key = f'ratelimit:{key}:{window}'
+        cache.add(current_key, 0, per * 2)
+        current = cache.incr(current_key)
+        previous = cache.get(f'ratelimit:{key}:{window - 1}', 0)
+        if previous * (1 - elapsed) + current <= rate:
+            return 0
+        # Rejected requests do not count against the budget, so a retry storm does not prolong itself
+        cache.decr(current_key)
+        if current > rate or not previous:
+            return (1 - elapsed) * per
+        # Wait until enough of the previous window has slid out
+        return (1 - (rate - current) / previous - elapsed) * per
+
+
+# Built on first use from RATE_LIMIT_BACKEND
+limiter = None
+
+
+def _limiter():
+    global limiter
+    if limiter is None:
+        if getattr(settings, 'RATE_LIMIT_BACKEND', 'local') == 'cache':
+            limiter = CacheLimiter(getattr(settings, 'RATE_LIMIT_CACHE', 'default'))
+        else:
+            limiter = LocalLimiter()
+    return limiter
+
+
+def rate_limit(name, keys, setting):
+    """
+    Decorator: reject a request with 429 once any of its keys is over budget.
+    keys maps a scope to func(request, **view_kwargs) returning that scope's key; the dict in
+    settings.<setting> maps the same scope to (requests, seconds). Scopes without a limit are not checked.
+    """
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapped_view(request, *args, **kwargs):
+            limits = getattr(settings, setting, {})
+            for scope, key_func in keys.items():
+                if scope not in limits:
+                    continue
+                requests, seconds = limits[scope]
+                retry_after = _limiter().hit(f'{name}:{scope}:{key_func(request, **kwargs)}', requests, seconds)
+                if retry_after:
+                    metrics.incr(f'ratelimit.{name}.rejected')
+                    metrics.incr(f'ratelimit.{name}.rejected.{scope}')
+                    response = JsonResponse({
+                        'success': False,
+                        'message': 'Too many requests. Please wait a moment and try again.',
+                    }, status=429)
+                    response['Retry-After'] = str(max(1, math.ceil(retry_after)))
+                    return response
+            metrics.incr(f'ratelimit.{name}.admitted')
+            return view_func(request, *args, **kwargs)
+        return wrapped_view
+    return decorator
@@ -0,0 +1,163 @@
+"""
+Helpers shared by the apps' tests.
+QueryCountTestCase renders a list view against a small and a larger synthetic dataset and fails
+if the number of queries grows with the number of rows; ExplainTestCase EXPLAINs hot queries
+against a synthetic dataset and fails if any falls back to a full scan of the table it reads.
+"""
+
+from datetime import time, timedelta
+import re
+import uuid
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+
+class QueryCountTestCase(TestCase):
+    small = 3
+    large = 30
+
+    @classmethod
+    def setUpTestData(cls):
+        from faculty.models import FacultyProfile
+
+        cls.admin = User.objects.create_user(username='qc-admin', is_staff=True)
+        cls.lecturer = User.objects.create_user(username='qc-faculty')
+        cls.profile = FacultyProfile.objects.create(user=cls.lecturer, department='Query counts')
+
+    def add_rows(self, start, total):
+        """Grow every listed table to `total` rows, each row with related rows to count."""
+        from attendance.models import Student, AttendanceRecord
+        from core.models import Course, ClassSession
+        from faculty.models import FacultyProfile, CourseAssignment
+
+        today = timezone.localdate()
+        for i in range(start, total):
+            course = Course.objects.create(course_code=f'QC-{i}', title=f'Course {i}')
+            course.lecturers.add(self.lecturer)
+            CourseAssignment.objects.create(faculty=self.profile, course=course, semester='Jan-Apr', year=2000 + i)
+            session = ClassSession.objects.create(
+                course=course, faculty=self.lecturer, title=f'Session {i}',
+                date=today, start_time=time(0, 0), end_time=time(23, 59, 59),
+            )
+            student = Student.objects.create(admission_number=f'Q{i:05d}', first_name='Query', last_name=str(i))
+            AttendanceRecord.objects.create(session=session, student=student, ip_address=f'10.0.{i // 256}.{i % 256}')
+            other = User.objects.create_user(username=f'qc-{i}')
+            FacultyProfile.objects.create(user=other, department='Query counts')
+
+    def assertFixedQueryCount(self, name, user):
+        """Request the view by URL name as user, at `small` and then at `large` rows, expecting as many queries."""
+        self.client.force_login(user)
+        self.add_rows(0, self.small)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(reverse(name))
+        self.assertEqual(response.status_code, 200)
+        self.add_rows(self.small, self.large)
+        with self.assertNumQueries(len(ctx.captured_queries)):
+            response = self.client.get(reverse(name))
+        self.assertEqual(response.status_code, 200)
+
+
+def full_scans(plan, table, limited=False):
+    """
+    Return the plan lines that read every row of table: a table scan, or a walk of a whole index
+    that no condition narrows. A limited query may walk an index that already yields its ordering,
+    because the walk stops after LIMIT rows.
+    """
+    lines = plan.splitlines()
+    if connection.vendor == 'postgresql':
+        table_scan = re.compile(rf'Seq Scan on {table}\b')
+        index_walk = re.compile(rf'Index (Only )?Scan (Backward )?using \S+ on {table}\b')
+        scans = []
+        for i, line in enumerate(lines):
+            if table_scan.search(line):
+                scans.append(line.strip())
+            elif index_walk.search(line) and not limited:
+                # The node's own details are indented deeper, up to its first child node
+                depth = len(line) - len(line.lstrip())
+                details = []
+                for detail in lines[i + 1:]:
+                    if len(detail) - len(detail.lstrip()) <= depth or detail.strip().startswith('->'):
+                        break
+                    details.append(detail)
+                if not any('Index Cond' in detail for detail in details):
+                    scans.append(line.strip())
+        return scans
+    # SQLite: "SEARCH <table>" narrows an index to a range; "SCAN <table>" reads the whole table or,
+    # with "USING [COVERING] INDEX", the whole index
+    scan = re.compile(rf'SCAN {table}\b')
+    ordered_walk = limited and 'USE TEMP B-TREE FOR ORDER BY' not in plan
+    return [line.strip() for line in lines if scan.search(line) and not (ordered_walk and ' USING ' in line)]
+
+
+# Each app's EXPLAIN checks, also run against the configured database by `manage.py explain_hot_queries`
+HOT_QUERY_TESTS = [
+    'core.tests.HotQueryTests',
+    'attendance.tests.HotQueryTests',
+    'faculty.tests.HotQueryTests',
+    'administration.tests.HotQueryTests',
+]
+
+
+class ExplainTestCase(TestCase):
+    rows = 2000
+    sessions_per_course = 10
+    students_per_session = 50
+
+    @classmethod
+    def setUpTestData(cls):
+        from administration.models import AdminLog
+        from attendance.models import Student, AttendanceRecord
+        from core.models import Course, ClassSession, Enrollment
+
+        # Tagged, since explain_hot_queries builds this dataset in a real database (and rolls it back)
+        tag = uuid.uuid4().hex[:8]
+        cls.lecturer = User.objects.create_user(username=f'explain-{tag}')
+        course_count = max(1, cls.rows // (cls.sessions_per_course * cls.students_per_session))
+        now = timezone.now()
+
+        students = Student.objects.bulk_create([
+            Student(admission_number=f'E{tag}{i:06d}', first_name='Explain', last_name=str(i))
+            for i in range(cls.students_per_session * course_count)
+        ])
+        records, logs = [], []
+        for c in range(course_count):
+            course = Course.objects.create(course_code=f'EXP-{tag}-{c}', title=f'Explain {c}')
+            cohort = students[c * cls.students_per_session:(c + 1) * cls.students_per_session]
+            Enrollment.objects.bulk_create([
+                Enrollment(student=s, course=course, status='approved') for s in cohort
+            ])
+            for d in range(cls.sessions_per_course):
+                session = ClassSession.objects.create(
+                    course=course, faculty=cls.lecturer, title=f'Explain {c}/{d}',
+                    date=timezone.localdate() - timedelta(days=d), start_time=time(8), end_time=time(10),
+                )
+                for i, s in enumerate(cohort):
+                    records.append(AttendanceRecord(
+                        session=session, student=s, ip_address=f'10.{c % 256}.{d}.{i}',
+                        timestamp=now - timedelta(days=d, minutes=i),
+                    ))
+        AttendanceRecord.objects.bulk_create(records, batch_size=1000)
+        for i in range(cls.rows):
+            logs.append(AdminLog(
+                admin=cls.lecturer, action=AdminLog.ACTION_CHOICES[i % len(AdminLog.ACTION_CHOICES)][0],
+                object_type='Explain', object_id=str(i), timestamp=now - timedelta(minutes=i),
+            ))
+        AdminLog.objects.bulk_create(logs, batch_size=1000)
+        cls.session, cls.student, cls.course = session, cohort[0], course
+
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+            if connection.vendor == 'postgresql':
+                # Small tables are cheaper to scan; ask whether a usable index exists at all
+                cursor.execute('SET LOCAL enable_seqscan = off')
+
+    def assertIndexed(self, queryset, table):
+        """Fail if EXPLAINing queryset shows a full scan of table."""
+        plan = queryset.explain()
+        limited = queryset.query.high_mark is not None
+        self.assertFalse(full_scans(plan, table, limited), f'Full scan of {table}:\n{plan}')
@@ -0,0 +1,98 @@
+"""
+Tests for the core app.
+"""
+
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.sessions.backends.db import SessionStore
+from django.db import connection
+from django.test import Client, SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .batching import BatchWriter
+from .benchmarks import synthetic_session
+from .models import ClassSession
+from .testing import ExplainTestCase
+
+
+class BatchWriterTests(SimpleTestCase):
+    def make_writer(self, batch_size=100, flush_interval_ms=50):
+        self.flushed = []
+        self.written = threading.Event()
+
+        def flush(batch):
+            self.flushed.append(list(batch))
+            self.written.set()
+
+        return BatchWriter('test_batch_writer', flush, batch_size=batch_size, flush_interval_ms=flush_interval_ms)
+
+    def test_single_item_is_flushed_after_the_interval(self):
+        writer = self.make_writer()
+        writer.put('a')
+        self.assertTrue(self.written.wait(1.0))
+        self.assertEqual(self.flushed, [['a']])
+
+    def test_item_after_an_earlier_flush_is_flushed_after_the_interval(self):
+        writer = self.make_writer()
+        writer.put('a')
+        self.assertTrue(self.written.wait(1.0))
+        self.written.clear()
+        # The writer thread is now idle on an empty queue; a new batch must still meet the deadline
+        time.sleep(writer.flush_interval * 2)
+        writer.put('b')
+        self.assertTrue(self.written.wait(1.0))
+        self.assertEqual(self.flushed, [['a'], ['b']])
+
+    def test_full_batch_is_flushed_without_waiting_for_the_interval(self):
+        writer = self.make_writer(batch_size=3, flush_interval_ms=60_000)
+        for item in 'abc':
+            writer.put(item)
+        self.assertTrue(self.written.wait(1.0))
+        self.assertEqual(self.flushed, [['a', 'b', 'c']])
+
+
+class HotQueryTests(ExplainTestCase):
+    def test_expire_sessions_ended_sessions(self):
+        self.assertIndexed(ClassSession.objects.ended(), 'core_classsession')
+
+
+@override_settings(ATTENDANCE_SUBMIT_RATE_LIMITS={})
+class LightweightPathsTests(TestCase):
+    def setUp(self):
+        # Like a phone that already holds a session, e.g. from the enrollment form
+        store = SessionStore()
+        store['visited'] = True
+        store.create()
+        self.client.cookies[settings.SESSION_COOKIE_NAME] = store.session_key
+
+    def assertNoSessionQueries(self, ctx):
+        session_queries = [q['sql'] for q in ctx.captured_queries if 'django_session' in q['sql']]
+        self.assertEqual(session_queries, [])
+
+    def test_mark_and_submit_skip_the_session_table(self):
+        with synthetic_session(1) as (session, admission_numbers):
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(f'/attendance/mark/{session.session_key}/')
+            self.assertEqual(response.status_code, 200)
+            self.assertNoSessionQueries(ctx)
+
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.post(
+                    f'/attendance/submit/{session.session_key}/',
+                    json.dumps({'admission_number': admission_numbers[0]}),
+                    content_type='application/json',
+                )
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertNoSessionQueries(ctx)
+
+    def test_other_paths_still_use_the_session(self):
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/faculty/dashboard/')
+        self.assertTrue(any('django_session' in q['sql'] for q in ctx.captured_queries))
+
+    def test_other_paths_still_check_csrf(self):
+        client = Client(enforce_csrf_checks=True)
+        self.assertEqual(client.post('/login/', {'username': 'x', 'password': 'x'}).status_code, 403)
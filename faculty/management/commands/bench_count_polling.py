@@ -0,0 +1,119 @@
+"""
+Management command that measures faculty polling latency during a submission burst.
+Runs the same burst of attendance submissions twice on the SQLite database, once with the
+rollback journal and once with SQLITE_PRAGMAS, while readers poll attendance_count_api, and
+reports how long the polls stalled.
+"""
+
+import itertools
+import json
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import Client
+from django.test.utils import override_settings
+from django.urls import reverse
+
+from core.benchmarks import synthetic_session, summarize
+
+# SQLite's defaults before the WAL profile
+ROLLBACK_JOURNAL = {'journal_mode': 'DELETE', 'synchronous': 'FULL'}
+
+
+class Command(BaseCommand):
+    help = 'Compare attendance_count_api latency during a submission burst with and without the SQLite WAL pragmas.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=400, help='Submissions in the burst (one per student)')
+        parser.add_argument('--writers', type=int, default=16, help='Submitting client threads')
+        parser.add_argument('--readers', type=int, default=4, help='Polling client threads')
+        parser.add_argument('--stall-ms', type=float, default=100.0, help='Polls slower than this count as stalls')
+        parser.add_argument('--json', action='store_true', help='Print the results as a single JSON object')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'sqlite':
+            raise CommandError('This benchmark compares SQLite journal modes; the default database is not SQLite.')
+
+        results = []
+        for name, pragmas in (('rollback journal', ROLLBACK_JOURNAL), ('SQLITE_PRAGMAS', settings.SQLITE_PRAGMAS)):
+            # Every connection opened from here on gets this profile's pragmas
+            connections.close_all()
+            # The burst is meant to reach the database, not the submission rate limits
+            with override_settings(SQLITE_PRAGMAS=pragmas, ATTENDANCE_SUBMIT_RATE_LIMITS={}):
+                result = self._burst(options)
+            connections.close_all()
+            result['profile'] = name
+            results.append(result)
+
+        if options['json']:
+            self.stdout.write(json.dumps(results))
+            return
+        self.stdout.write(f'{"profile":<18}{"polls":>7}{"p50 ms":>9}{"p99 ms":>9}{"max ms":>9}{"stalls":>8}{"errors":>8}{"submit/s":>10}')
+        for r in results:
+            polls = r['polls']
+            self.stdout.write(
+                f'{r["profile"]:<18}{polls["count"]:>7}{polls["p50_ms"]:>9.1f}{polls["p99_ms"]:>9.1f}{polls["max_ms"]:>9.1f}'
+                f'{r["stalls"]:>8}{r["poll_errors"]:>8}{r["submit_rps"]:>10.0f}'
+            )
+
+    def _burst(self, options):
+        total = options['requests']
+        with synthetic_session(total) as (session, admission_numbers):
+            submit_url = f'/attendance/submit/{session.session_key}/'
+            count_url = reverse('faculty:attendance_count_api', args=[session.id])
+            counter = itertools.count()
+            lock = threading.Lock()
+            done = threading.Event()
+            polls, statuses = [], Counter()
+
+            def writer():
+                client = Client()
+                try:
+                    while True:
+                        i = next(counter)
+                        if i >= total:
+                            break
+                        body = json.dumps({'admission_number': admission_numbers[i]})
+                        remote_addr = f'10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}'
+                        client.post(submit_url, body, content_type='application/json', REMOTE_ADDR=remote_addr)
+                finally:
+                    connection.close()
+
+            def reader():
+                client = Client()
+                client.force_login(session.faculty)
+                try:
+                    while not done.is_set():
+                        start = time.perf_counter()
+                        response = client.get(count_url)
+                        elapsed = time.perf_counter() - start
+                        with lock:
+                            polls.append(elapsed)
+                            statuses[response.status_code] += 1
+                finally:
+                    connection.close()
+
+            readers = [threading.Thread(target=reader) for _ in range(options['readers'])]
+            writers = [threading.Thread(target=writer) for _ in range(options['writers'])]
+            for thread in readers:
+                thread.start()
+            started = time.perf_counter()
+            for thread in writers:
+                thread.start()
+            for thread in writers:
+                thread.join()
+            wall = time.perf_counter() - started
+            done.set()
+            for thread in readers:
+                thread.join()
+
+        return {
+            'polls': summarize(polls),
+            'stalls': sum(1 for p in polls if p * 1000 >= options['stall_ms']),
+            'poll_errors': sum(count for status, count in statuses.items() if status != 200),
+            'submit_rps': total / wall if wall else 0.0,
+        }
@@ -7,6 +7,11 @@ from django.db import models
 from django.contrib.auth.models import User
 from core.models import Course
 
+class FacultyProfileQuerySet(models.QuerySet):
+    def with_course_counts(self):
+        """Annotate course_count in the same query instead of one COUNT per faculty member."""
+        return self.annotate(course_count=models.Count('course_assignments'))
+
 class FacultyProfile(models.Model):
     """Extended profile for faculty members"""
     user = models.OneToOneField(User, on_delete=models.CASCADE)
@@ -14,6 +19,8 @@ class FacultyProfile(models.Model):
     phone = models.CharField(max_length=20, blank=True)
     bio = models.TextField(blank=True)
     
+    objects = FacultyProfileQuerySet.as_manager()
+    
     def __str__(self):
         return f"{self.user.get_full_name() or self.user.username}"
 
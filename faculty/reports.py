@@ -0,0 +1,92 @@
+"""
+Course attendance reports for the faculty app.
+Builds a student x session matrix for a course, optionally narrowed to a semester, from one query
+ordered by student, and streams it as CSV or XLSX one matrix row at a time.
+"""
+
+from itertools import groupby
+import tempfile
+
+from django.db.models import FilteredRelation, Q
+from django.http import FileResponse
+
+from attendance.models import Student
+from core.exports import csv_response, EXPORT_CHUNK_SIZE
+from core.models import ClassSession
+
+REPORT_FORMATS = ('csv', 'xlsx')
+XLSX_CONTENT_TYPE = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+
+
+class AttendanceMatrix:
+    """Approved students of a course against its sessions, as rows of P/A marks."""
+
+    def __init__(self, course, semester=None, year=None):
+        self.course = course
+        self.scope = [part for part in (course.course_code, semester, year) if part]
+        sessions = ClassSession.objects.filter(course=course)
+        if semester:
+            sessions = sessions.filter(semester=semester)
+        if year:
+            sessions = sessions.filter(date__year=year)
+        # Columns are the only part of the matrix held in full
+        self.sessions = list(sessions.order_by('date', 'start_time', 'id').only('id', 'title', 'date', 'start_time'))
+
+    def header(self):
+        columns = [f"{s.date:%Y-%m-%d} {s.start_time:%H:%M} {s.title}" for s in self.sessions]
+        return ["Admission Number", "Name"] + columns + ["Attended", "Attendance %"]
+
+    def _cells(self):
+        """(admission_number, first_name, last_name, session_id or None), ordered by student."""
+        session_ids = [s.id for s in self.sessions]
+        students = Student.objects.filter(enrollments__course=self.course, enrollments__status='approved')
+        if not session_ids:
+            # An empty IN condition would drop every student from the join; with no sessions nobody attended
+            return (
+                (admission_number, first_name, last_name, None)
+                for admission_number, first_name, last_name in students
+                .order_by('admission_number')
+                .values_list('admission_number', 'first_name', 'last_name')
+                .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+            )
+        # The LEFT JOIN keeps approved students who attended nothing; records of other courses never join
+        return (
+            students
+            .annotate(marked=FilteredRelation(
+                'attendance_records', condition=Q(attendance_records__session_id__in=session_ids),
+            ))
+            .order_by('admission_number')
+            .values_list('admission_number', 'first_name', 'last_name', 'marked__session_id')
+            .iterator(chunk_size=EXPORT_CHUNK_SIZE)
+        )
+
+    def rows(self):
+        """Yield the header and then one row per student, holding only that student's marks."""
+        yield self.header()
+        total = len(self.sessions)
+        for (admission_number, first_name, last_name), cells in groupby(self._cells(), key=lambda cell: cell[:3]):
+            attended = {cell[3] for cell in cells if cell[3] is not None}
+            marks = ['P' if s.id in attended else 'A' for s in self.sessions]
+            percentage = round(100 * len(attended) / total, 1) if total else 0
+            yield [admission_number, f"{first_name} {last_name}"] + marks + [len(attended), percentage]
+
+    def filename(self, extension):
+        return f"attendance_{'_'.join(map(str, self.scope))}.{extension}"
+
+
+def csv_report(matrix):
+    return csv_response(matrix.rows(), matrix.filename('csv'))
+
+
+def xlsx_report(matrix):
+    """Write the matrix with openpyxl's write-only workbook, which spills rows to disk, and stream the file."""
+    from openpyxl import Workbook  # Optional dependency, only needed for XLSX reports
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet('Attendance')
+    for row in matrix.rows():
+        sheet.append(row)
+    output = tempfile.TemporaryFile()
+    workbook.save(output)
+    output.seek(0)
+    return FileResponse(output, as_attachment=True, filename=matrix.filename('xlsx'), content_type=XLSX_CONTENT_TYPE)
@@ -0,0 +1,110 @@
+"""
+Tests for the faculty app.
+"""
+
+from datetime import time, timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.cache.backends.db import DatabaseCache
+from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from attendance.models import Student, AttendanceRecord
+from core.models import Course, ClassSession, Enrollment
+from core.testing import ExplainTestCase, QueryCountTestCase
+from . import views
+from .reports import AttendanceMatrix
+
+
+class AttendanceMatrixTests(TestCase):
+    def setUp(self):
+        self.lecturer = User.objects.create_user(username='lecturer')
+        self.course = Course.objects.create(course_code='REP-101', title='Reports')
+        self.students = [
+            Student.objects.create(admission_number=f'R{i}', first_name='Student', last_name=str(i))
+            for i in range(2)
+        ]
+        for student in self.students:
+            Enrollment.objects.create(student=student, course=self.course, status='approved')
+
+    def test_course_without_sessions_lists_every_student(self):
+        rows = list(AttendanceMatrix(self.course).rows())
+        self.assertEqual(rows[0], ["Admission Number", "Name", "Attended", "Attendance %"])
+        self.assertEqual(rows[1:], [['R0', 'Student 0', 0, 0], ['R1', 'Student 1', 0, 0]])
+
+    def test_filter_without_sessions_lists_every_student(self):
+        session = ClassSession.objects.create(
+            course=self.course, faculty=self.lecturer, title='Lecture', semester='Jan-Apr',
+            start_time=time(8), end_time=time(10),
+        )
+        AttendanceRecord.objects.create(session=session, student=self.students[0])
+        rows = list(AttendanceMatrix(self.course, semester='May-Aug').rows())
+        self.assertEqual(rows[1:], [['R0', 'Student 0', 0, 0], ['R1', 'Student 1', 0, 0]])
+
+    def test_marks_students_against_sessions(self):
+        session = ClassSession.objects.create(
+            course=self.course, faculty=self.lecturer, title='Lecture', start_time=time(8), end_time=time(10),
+        )
+        AttendanceRecord.objects.create(session=session, student=self.students[0])
+        rows = list(AttendanceMatrix(self.course).rows())
+        self.assertEqual(rows[1:], [['R0', 'Student 0', 'P', 1, 100.0], ['R1', 'Student 1', 'A', 0, 0.0]])
+
+
+@mock.patch.object(views, 'STREAM_MAX_CONCURRENT', 1)
+class AttendanceStreamLimitTests(TestCase):
+    def setUp(self):
+        caches[views.STREAM_CACHE].clear()
+        lecturer = User.objects.create_user(username='lecturer')
+        course = Course.objects.create(course_code='STR-101', title='Streams')
+        session = ClassSession.objects.create(
+            course=course, faculty=lecturer, title='Lecture', start_time=time(8), end_time=time(10),
+        )
+        self.url = reverse('faculty:attendance_stream', args=[session.id])
+        self.client.force_login(lecturer)
+
+    def test_streams_past_the_limit_are_refused(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, 200)
+        refused = self.client.get(self.url)
+        self.assertEqual(refused.status_code, 503)
+        self.assertEqual(refused['Retry-After'], str(views.STREAM_MAX_SECONDS))
+        first.close()
+
+    def test_slots_held_by_another_worker_count_against_the_cap(self):
+        # Another worker process has its own cache instance over the same table
+        other_worker = DatabaseCache(settings.CACHES[views.STREAM_CACHE]['LOCATION'], {})
+        self.assertTrue(other_worker.add('attendance_stream:slot:0', True, 60))
+        self.assertEqual(self.client.get(self.url).status_code, 503)
+        other_worker.delete('attendance_stream:slot:0')
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+    def test_closing_a_stream_frees_its_slot(self):
+        self.client.get(self.url).close()
+        second = self.client.get(self.url)
+        self.assertEqual(second.status_code, 200)
+        second.close()
+
+
+class ListQueryCountTests(QueryCountTestCase):
+    def test_dashboard(self):
+        self.assertFixedQueryCount('faculty:dashboard', self.lecturer)
+
+    def test_session_list(self):
+        self.assertFixedQueryCount('faculty:session_list', self.lecturer)
+
+
+class HotQueryTests(ExplainTestCase):
+    def test_session_list_sessions_by_lecturer(self):
+        since = timezone.localdate() - timedelta(days=7)
+        self.assertIndexed(ClassSession.objects.filter(faculty=self.lecturer, date__gte=since), 'core_classsession')
+
+    def test_records_since(self):
+        self.assertIndexed(
+            AttendanceRecord.objects.filter(session=self.session, id__gt=0), 'attendance_attendancerecord',
+        )
@@ -7,20 +7,39 @@ Includes detailed docstrings and inline comments for clarity.
 from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required, user_passes_test
 from django.utils import timezone
-from django.http import JsonResponse, HttpResponseForbidden, HttpResponse
-from django.db.models import Count, Q
+from django.http import JsonResponse, HttpResponseForbidden, HttpResponse, HttpResponseBadRequest, StreamingHttpResponse
+from django.db.models import Count, Max, Q
 from django.contrib import messages
 from django.utils.timezone import now
-import csv
+from django.utils.cache import get_conditional_response
+from django.utils.formats import date_format
+from django.utils.dateparse import parse_datetime
+from django.conf import settings
+from django.core.cache import caches
+import json
+import time
 
+from core.middleware import allow_client_caching
 from core.models import Course, ClassSession, Enrollment, EnrollmentKey
+from core.pubsub import hub, session_channel
+from core.qr import get_renderer, qr_etag
+from core.exports import csv_response, EXPORT_CHUNK_SIZE
+from attendance import counters
 from attendance.models import AttendanceRecord, Student
 from .models import FacultyProfile, CourseAssignment
+from .reports import AttendanceMatrix, REPORT_FORMATS, csv_report, xlsx_report
 from administration.views import log_admin_action
 
 # Helper function to check if user is admin
 from django.contrib.auth.models import User
 
+# Live attendance stream tuning (seconds)
+STREAM_HEARTBEAT = getattr(settings, 'ATTENDANCE_STREAM_HEARTBEAT', 15)
+STREAM_MAX_SECONDS = getattr(settings, 'ATTENDANCE_STREAM_MAX_SECONDS', 300)
+STREAM_DEBOUNCE = 0.5
+STREAM_MAX_CONCURRENT = getattr(settings, 'ATTENDANCE_STREAM_MAX_CONCURRENT', 4)
+STREAM_CACHE = getattr(settings, 'ATTENDANCE_STREAM_CACHE', 'shared')
+
 def is_admin(user):
     return user.is_staff or user.is_superuser
 
@@ -34,7 +53,7 @@ def dashboard(request):
     )
     
     # Get assigned courses
-    course_assignments = CourseAssignment.objects.filter(faculty=faculty_profile)
+    course_assignments = CourseAssignment.objects.filter(faculty=faculty_profile).select_related('course')
     courses = [assignment.course for assignment in course_assignments]
     
     # Get recent sessions
@@ -42,11 +61,7 @@ def dashboard(request):
         course__in=courses,
         faculty=request.user,
         date__gte=timezone.now().date() - timezone.timedelta(days=7)
-    ).order_by('-date', '-start_time')[:5]
-    
-    # Count attendance for each session
-    for session in recent_sessions:
-        session.attendance_count = AttendanceRecord.objects.filter(session=session).count()
+    ).select_related('course').with_attendance_counts().order_by('-date', '-start_time')[:5]
     
     context = {
         'faculty': faculty_profile,
@@ -66,23 +81,9 @@ def session_list(request):
     )
     
     # Get assigned courses
-    course_assignments = CourseAssignment.objects.filter(faculty=faculty_profile)
+    course_assignments = CourseAssignment.objects.filter(faculty=faculty_profile).select_related('course')
     courses = [assignment.course for assignment in course_assignments]
     
-    # Improved: Automatically deactivate sessions whose end datetime has passed
-    from datetime import datetime
-    from django.utils.timezone import make_aware, is_naive
-    now_dt = timezone.localtime(timezone.now())
-    expired_sessions = ClassSession.objects.filter(is_active=True)
-    for session in expired_sessions:
-        session_end = datetime.combine(session.date, session.end_time)
-        if is_naive(session_end):
-            session_end = make_aware(session_end)
-        session_end = timezone.localtime(session_end)
-        if now_dt > session_end:
-            session.is_active = False
-            session.save()
-    
     # Filter sessions
     filter_course = request.GET.get('course')
     filter_date_start = request.GET.get('date_start')
@@ -103,12 +104,8 @@ def session_list(request):
     if filter_date_end:
         sessions = sessions.filter(date__lte=filter_date_end)
     
-    # Order by date and time
-    sessions = sessions.order_by('-date', '-start_time')
-    
-    # Count attendance for each session
-    for session in sessions:
-        session.attendance_count = AttendanceRecord.objects.filter(session=session).count()
+    # Order by date and time, counting attendance in the same query
+    sessions = sessions.select_related('course').with_attendance_counts().order_by('-date', '-start_time')
     
     context = {
         'faculty': faculty_profile,
@@ -131,7 +128,7 @@ def create_session(request):
     )
     
     # Get assigned courses
-    course_assignments = CourseAssignment.objects.filter(faculty=faculty_profile)
+    course_assignments = CourseAssignment.objects.filter(faculty=faculty_profile).select_related('course')
     courses = [assignment.course for assignment in course_assignments]
     
     if request.method == 'POST':
@@ -186,19 +183,45 @@ def session_detail(request, session_id):
     if session.faculty != request.user:
         return HttpResponseForbidden("You don't have permission to view this session")
     
-    # Get attendance records
-    attendance_records = AttendanceRecord.objects.filter(session=session)
+    # Get attendance records; the live stream picks up from the newest one rendered here
+    attendance_records = list(AttendanceRecord.objects.filter(session=session).select_related('student').order_by('id'))
     
     context = {
         'faculty': faculty_profile,
         'session': session,
         'attendance_records': attendance_records,
-        'qr_code': session.get_qr_code(request),
-        'attendance_count': attendance_records.count(),
+        'attendance_count': len(attendance_records),
+        'last_record_id': attendance_records[-1].id if attendance_records else 0,
     }
     
     return render(request, 'faculty/session_detail.html', context)
 
+@login_required
+@allow_client_caching
+def session_qr(request, session_id):
+    """Serve a session's QR code image, revalidated by ETag so refreshes skip re-rendering."""
+    session = get_object_or_404(ClassSession, id=session_id)
+    if session.faculty != request.user:
+        return HttpResponseForbidden("You don't have permission to view this session")
+    
+    # Optional ?format=png|svg|matrix, defaulting to settings.QR_CODE_RENDERER
+    try:
+        renderer = get_renderer(request.GET.get('format'))
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+    
+    # The image depends only on the session key, URL and renderer, so the ETag is known before rendering
+    etag = qr_etag(session.session_key, session.get_attendance_url(request), renderer)
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+    
+    image = session.get_qr_image(request, renderer)
+    response = HttpResponse(image.content, content_type=image.content_type)
+    response['ETag'] = image.etag
+    response['Cache-Control'] = 'private, no-cache'
+    return response
+
 @login_required
 def edit_session(request, session_id):
     """Edit details of an existing session."""
@@ -256,48 +279,59 @@ def delete_session(request, session_id):
 @login_required
 def attendance_report(request, session_id):
     """Generate and display attendance report for a session."""
-    # Get session
-    session = get_object_or_404(ClassSession, id=session_id)
+    # Get session, with the course and lecturer the report heading needs
+    session = get_object_or_404(ClassSession.objects.select_related('course', 'faculty'), id=session_id)
     
     # Check if faculty owns the session
     if session.faculty != request.user:
         return HttpResponseForbidden("You don't have permission to access this report")
     
-    # Get attendance records
-    attendance_records = AttendanceRecord.objects.filter(session=session)
-    
-    # Add session details as a heading in the CSV file
-    csv_data = [
-        [
+    def rows():
+        # Add session details as a heading in the CSV file
+        yield [
             f"Course: {session.course.course_code} - {session.course.title}",
             f"Date: {session.date}",
             f"Time: {session.start_time} - {session.end_time}",
             f"Lecturer: {session.faculty.get_full_name()}",
             f"Semester: {session.semester}"
-        ],
-        []  # Empty row for spacing
-    ]
+        ]
+        yield []  # Empty row for spacing
 
-    # Add column headers
-    csv_data.append(["Admission Number", "Name", "Timestamp", "Status"])
+        # Add column headers
+        yield ["Admission Number", "Name", "Timestamp", "Status"]
 
-    # Add attendance records
-    for record in attendance_records:
-        csv_data.append([
-            record.student.admission_number,
-            f"{record.student.first_name} {record.student.last_name}",
-            record.timestamp.strftime("%B %d, %Y %H:%M"),
-            "Verified" if record.is_verified else "Not Verified"
-        ])
+        # Stream attendance records straight from the database
+        attendance_records = AttendanceRecord.objects.filter(session=session).values_list(
+            'student__admission_number', 'student__first_name', 'student__last_name', 'timestamp', 'is_verified'
+        )
+        for admission_number, first_name, last_name, timestamp, is_verified in attendance_records.iterator(chunk_size=EXPORT_CHUNK_SIZE):
+            yield [
+                admission_number,
+                f"{first_name} {last_name}",
+                timestamp.strftime("%B %d, %Y %H:%M"),
+                "Verified" if is_verified else "Not Verified"
+            ]
 
-    # Generate CSV response
-    response = HttpResponse(content_type='text/csv')
-    response['Content-Disposition'] = f'attachment; filename="attendance_report_{session.id}.csv"'
+    return csv_response(rows(), f"attendance_report_{session.id}.csv")
 
-    writer = csv.writer(response)
-    writer.writerows(csv_data)
+@login_required
+def course_attendance_report(request, course_id):
+    """Download a course's student x session attendance matrix (?format=csv|xlsx, optional ?semester= and ?year=)."""
+    course = get_object_or_404(Course, id=course_id, lecturers=request.user)
+    report_format = request.GET.get('format', 'csv')
+    if report_format not in REPORT_FORMATS:
+        return HttpResponseBadRequest(f"Unknown report format; expected one of {', '.join(REPORT_FORMATS)}")
+    year = request.GET.get('year')
+    if year and not year.isdigit():
+        return HttpResponseBadRequest("Invalid year")
 
-    return response
+    matrix = AttendanceMatrix(course, semester=request.GET.get('semester'), year=year)
+    if report_format == 'xlsx':
+        try:
+            return xlsx_report(matrix)
+        except ImportError:
+            return HttpResponseBadRequest("XLSX reports require openpyxl; download the CSV instead")
+    return csv_report(matrix)
 
 @login_required
 def attendance_records_partial(request, session_id):
@@ -305,19 +339,146 @@ def attendance_records_partial(request, session_id):
     session = get_object_or_404(ClassSession, id=session_id)
     if session.faculty != request.user:
         return HttpResponseForbidden("You don't have permission to view this session")
-    attendance_records = AttendanceRecord.objects.filter(session=session)
+    attendance_records = AttendanceRecord.objects.filter(session=session).select_related('student')
     return render(request, 'faculty/attendance_records_partial.html', {
         'attendance_records': attendance_records
     })
 
+@login_required
+def attendance_records_since(request, session_id):
+    """JSON of the records added after a cursor (?since_id= or ISO ?since=), with ETag/304 for idle polls."""
+    session = get_object_or_404(ClassSession, id=session_id)
+    if session.faculty != request.user:
+        return JsonResponse({'error': "You don't have permission."}, status=403)
+    
+    records = AttendanceRecord.objects.filter(session=session)
+    since_id = request.GET.get('since_id')
+    since = request.GET.get('since')
+    try:
+        if since_id:
+            records = records.filter(id__gt=int(since_id))
+        elif since:
+            since_dt = parse_datetime(since)
+            if since_dt is None:
+                raise ValueError(since)
+            if timezone.is_naive(since_dt):
+                since_dt = timezone.make_aware(since_dt)
+            records = records.filter(timestamp__gt=since_dt)
+    except ValueError:
+        return JsonResponse({'error': 'Invalid since_id or since value.'}, status=400)
+    
+    # One aggregate answers "has anything changed?"; idle polls stop here with a 304
+    state = AttendanceRecord.objects.filter(session=session).aggregate(last_id=Max('id'), count=Count('id'))
+    etag = f'"{session.id}-{since_id or since or 0}-{state["last_id"] or 0}-{state["count"]}"'
+    not_modified = get_conditional_response(request, etag=etag)
+    if not_modified is not None:
+        return not_modified
+    
+    new_records = [serialize_attendance_record(r) for r in records.select_related('student').order_by('id')]
+    response = JsonResponse({
+        'records': new_records,
+        'attendance_count': state['count'],
+        'last_id': new_records[-1]['id'] if new_records else (int(since_id) if since_id else 0),
+    })
+    response['ETag'] = etag
+    return response
+
 @login_required
 def attendance_count_api(request, session_id):
     """API endpoint to get attendance count for a session."""
     session = get_object_or_404(ClassSession, id=session_id)
-    if session.faculty != request.user:
+    if session.faculty_id != request.user.id:
         return JsonResponse({'error': "You don't have permission."}, status=403)
-    count = AttendanceRecord.objects.filter(session=session).count()
-    return JsonResponse({'attendance_count': count})
+    # Read from the cached per-session counter instead of counting on every poll
+    return JsonResponse({'attendance_count': counters.session_count(session.id)})
+
+def serialize_attendance_record(record):
+    """Compact JSON representation of an attendance record for live views."""
+    return {
+        'id': record.id,
+        'admission_number': record.student.admission_number,
+        'name': f"{record.student.first_name} {record.student.last_name}",
+        'timestamp': date_format(timezone.localtime(record.timestamp), 'DATETIME_FORMAT'),
+        'is_verified': record.is_verified,
+    }
+
+def _attendance_event_stream(session, last_id):
+    """Yield server-sent events carrying records newer than last_id and the running count."""
+    subscription = hub.subscribe(session_channel(session.id))
+    try:
+        records = AttendanceRecord.objects.filter(session=session).select_related('student').order_by('id')
+        count = records.filter(id__lte=last_id).count()
+        deadline = time.monotonic() + STREAM_MAX_SECONDS
+        # Ask the browser to reconnect quickly when the stream is recycled
+        yield 'retry: 3000\n\n'
+        while True:
+            new_records = [serialize_attendance_record(r) for r in records.filter(id__gt=last_id)]
+            if new_records:
+                last_id = new_records[-1]['id']
+                count += len(new_records)
+                payload = json.dumps({'records': new_records, 'attendance_count': count})
+                yield f'id: {last_id}\nevent: records\ndata: {payload}\n\n'
+            if time.monotonic() >= deadline:
+                break
+            # Woken by a local publish; the timeout also catches records written by other workers
+            if subscription.wait(STREAM_HEARTBEAT):
+                time.sleep(STREAM_DEBOUNCE)  # Let a burst of scans coalesce into one event
+            else:
+                yield ': keepalive\n\n'
+    finally:
+        hub.unsubscribe(subscription)
+
+def _take_stream_slot():
+    """Claim one of STREAM_MAX_CONCURRENT stream slots; returns its cache key, or None when all are taken."""
+    cache = caches[STREAM_CACHE]
+    # Freed when the stream closes; a slot held by a killed worker expires once its stream would have ended
+    timeout = STREAM_MAX_SECONDS + STREAM_HEARTBEAT + 1
+    for i in range(STREAM_MAX_CONCURRENT):
+        key = f'attendance_stream:slot:{i}'
+        if cache.add(key, True, timeout):
+            return key
+    return None
+
+class _SlotStream:
+    """An event stream holding a slot; the response closes it when the stream ends or the client goes away."""
+
+    def __init__(self, events, slot):
+        self.events = events
+        self.slot = slot
+
+    def __iter__(self):
+        return self.events
+
+    def close(self):
+        self.events.close()
+        if self.slot is not None:
+            caches[STREAM_CACHE].delete(self.slot)
+            self.slot = None
+
+@login_required
+def attendance_stream(request, session_id):
+    """Server-sent events stream of new attendance records and the updated count for a session."""
+    session = get_object_or_404(ClassSession, id=session_id)
+    if session.faculty != request.user:
+        return HttpResponseForbidden("You don't have permission to view this session")
+    
+    # EventSource sends Last-Event-ID when it reconnects; the first connection passes ?last_id=
+    try:
+        last_id = int(request.headers.get('Last-Event-ID') or request.GET.get('last_id') or 0)
+    except ValueError:
+        last_id = 0
+    
+    # Each open stream holds a worker, so past the cap the page polls attendance_records_since instead
+    slot = _take_stream_slot()
+    if slot is None:
+        response = HttpResponse("Too many live attendance streams are open; polling instead", status=503)
+        response['Retry-After'] = str(STREAM_MAX_SECONDS)
+        return response
+    
+    events = _SlotStream(_attendance_event_stream(session, last_id), slot)
+    response = StreamingHttpResponse(events, content_type='text/event-stream')
+    response['X-Accel-Buffering'] = 'no'  # Stop nginx from buffering the stream
+    return response
 
 @login_required
 def course_enrollments(request, course_id):